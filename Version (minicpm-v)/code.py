@@ -56,8 +56,9 @@ def extract_images_from_pdf(pdf_path):
 
 
 def query_minicpm_with_image(image, query):
+    temp_image_path = None
     try:
-        # Save the image to a temporary file
+        # Save the image to a temporary file (removed again below)
         temp_image_path = tempfile.NamedTemporaryFile(delete=False, suffix=".png").name
         image.save(temp_image_path)
 
@@ -76,6 +77,9 @@ def query_minicpm_with_image(image, query):
     except Exception as e:
         st.error(f"An error occurred while querying MiniCPM: {e}")
         return "Error occurred."
+    finally:
+        if temp_image_path and os.path.exists(temp_image_path):
+            os.remove(temp_image_path)
 
 
 def query_ollama_with_text(query, context):
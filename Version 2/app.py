@@ -1,14 +1,31 @@
 # app.py
 
 import streamlit as st
-import tempfile
 import os
+import time
+import uuid
+from PIL import Image
 
-# Import modularized functions
+# Import modularized functions (heavy modules load lazily on first use)
 import config
-import pdf_processor
-import vector_store
-import llm_handler
+import lazy_imports
+import upload_store
+import session_log
+
+ingest = lazy_imports.lazy("ingest")
+vector_store = lazy_imports.lazy("vector_store")
+llm_handler = lazy_imports.lazy("llm_handler")
+page_renderer = lazy_imports.lazy("page_renderer")
+bundle = lazy_imports.lazy("bundle")
+prefetch = lazy_imports.lazy("prefetch")
+image_index = lazy_imports.lazy("image_index")
+
+try:
+    from st_keyup import st_keyup  # Live input for prefetching while the user types
+except ImportError:
+    st_keyup = None
+    if config.PREFETCH_WHILE_TYPING:
+        print("streamlit-keyup is not installed; prefetching while typing is off (pip install streamlit-keyup)")
 
 # --- Page and Session State Setup ---
 st.set_page_config(page_title="AI PDF & Image Chatbot", layout="wide")
@@ -24,6 +41,75 @@ def initialize_session_state():
         st.session_state.pdf_path = None
     if 'images' not in st.session_state:
         st.session_state.images = []
+    if 'tables' not in st.session_state:
+        st.session_state.tables = None
+    if 'image_index' not in st.session_state:
+        st.session_state.image_index = None
+    if 'doc_hash' not in st.session_state:
+        st.session_state.doc_hash = None
+    if 'document' not in st.session_state:
+        st.session_state.document = None  # (path, hash) of the processed document; pdf_path/doc_hash are the selection
+    if 'follow_ups' not in st.session_state:
+        st.session_state.follow_ups = []
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if 'chunking' not in st.session_state:
+        st.session_state.chunking = (config.DEFAULT_CHUNK_SIZE, config.DEFAULT_CHUNK_OVERLAP)
+
+def get_prefetcher():
+    """The session's retrieval prefetcher, recreated whenever a different document is loaded."""
+    if not config.PREFETCH_ENABLED:
+        return None
+    prefetcher = st.session_state.get('prefetcher')
+    if prefetcher is None or prefetcher.vectorstore is not st.session_state.vectorstore:
+        prefetcher = prefetch.RetrievalPrefetcher(
+            st.session_state.vectorstore, config.PREFETCH_MAX_WASTED, config.PREFETCH_CACHE_ENTRIES
+        )
+        st.session_state.prefetcher = prefetcher
+        st.session_state.follow_ups = []
+    return prefetcher
+
+def queue_prompt(prompt: str):
+    """Button callback: submits a suggested follow-up question on the next run."""
+    st.session_state.queued_prompt = prompt
+    st.session_state.follow_ups = []
+
+# --- Document Processing ---
+@st.cache_resource(max_entries=config.PROCESSED_CACHE_ENTRIES, show_spinner=False)
+def process_document(doc_hash: str, chunk_size: int, chunk_overlap: int, _pdf_path: str) -> dict:
+    """Processes a PDF once per content hash and chunking settings; identical files reuse the result.
+
+    A prebuilt bundle for the same content and settings is opened instead of processing the PDF;
+    one that cannot be loaded is treated as missing.
+    """
+    path = bundle.bundle_path(doc_hash, chunk_size, chunk_overlap)
+    if os.path.exists(path):
+        try:
+            loaded = bundle.load_bundle(path)
+        except Exception as e:  # Stale format, other embedding model, truncated file: process the PDF instead
+            print(f"Ignoring unusable bundle {path}: {e}")
+        else:
+            if loaded['image_index'] is None:
+                loaded['image_index'] = image_index.ImageIndex.build(loaded['images'])
+            loaded.update(stats={'bundle': path, 'tables': len(loaded['tables'])}, warnings=[])
+            return loaded
+
+    parsed = ingest.ingest_pdf(_pdf_path, chunk_size, chunk_overlap)
+    if not parsed['chunks']:
+        raise ingest.IngestError("No text could be extracted from this PDF.")
+    vectorstore = vector_store.create_vector_store(
+        parsed['chunks'], buffer=parsed['buffer'], page_starts=parsed['page_starts']
+    )
+    figure_index = image_index.ImageIndex.build(parsed['images'], parsed['stats'], parsed['fingerprints'])
+    if config.SAVE_BUNDLES and not parsed['warnings']:
+        bundle.export_bundle(
+            path, vectorstore, parsed['images'], _pdf_path, doc_hash, chunk_size, chunk_overlap,
+            parsed['tables'], figure_index
+        )
+    return {
+        'vectorstore': vectorstore, 'images': parsed['images'], 'tables': parsed['tables'],
+        'image_index': figure_index, 'stats': parsed['stats'], 'warnings': parsed['warnings'],
+    }
 
 # --- Sidebar for PDF Upload and Processing ---
 def setup_sidebar():
@@ -37,29 +123,88 @@ def setup_sidebar():
 
     if option == 'Use a default document':
         domain = st.sidebar.selectbox("Choose a domain:", list(config.DEFAULT_PDFS.keys()))
-        st.session_state.pdf_path = config.DEFAULT_PDFS.get(domain)
+        if st.session_state.pdf_path != config.DEFAULT_PDFS.get(domain):
+            st.session_state.pdf_path = config.DEFAULT_PDFS.get(domain)
+            st.session_state.doc_hash = (
+                upload_store.file_digest(st.session_state.pdf_path) if os.path.exists(st.session_state.pdf_path) else None
+            )
     else:
         uploaded_file = st.sidebar.file_uploader("Upload a PDF", type="pdf")
-        if uploaded_file:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                tmp.write(uploaded_file.getvalue())
-                st.session_state.pdf_path = tmp.name
+        if uploaded_file and st.session_state.get('upload_id') != uploaded_file.file_id:
+            uploaded_file.seek(0)
+            st.session_state.doc_hash, st.session_state.pdf_path = upload_store.store.put(uploaded_file)
+            st.session_state.upload_id = uploaded_file.file_id
 
     st.sidebar.subheader("Chunking Settings")
-    chunk_size = st.sidebar.slider("Chunk Size", 500, 2000, config.DEFAULT_CHUNK_SIZE, 100)
-    chunk_overlap = st.sidebar.slider("Chunk Overlap", 0, 500, config.DEFAULT_CHUNK_OVERLAP, 50)
+    max_chunk_size = config.EMBEDDING_MAX_TOKENS * config.CHARS_PER_TOKEN // 100 * 100  # Longer chunks are cut anyway
+    chunk_size = st.sidebar.slider(
+        "Chunk Size", 200, max_chunk_size, min(config.DEFAULT_CHUNK_SIZE, max_chunk_size), 100,
+        help=f"Capped at the embedding model's input limit (~{config.EMBEDDING_MAX_TOKENS} tokens)"
+    )
+    chunk_overlap = st.sidebar.slider("Chunk Overlap", 0, chunk_size // 2, min(config.DEFAULT_CHUNK_OVERLAP, chunk_size // 2), 50)
 
     if st.sidebar.button("Process PDF", use_container_width=True, type="primary"):
         if st.session_state.pdf_path and os.path.exists(st.session_state.pdf_path):
             with st.spinner("Processing PDF... This may take a moment."):
-                text_chunks = pdf_processor.extract_text_and_split(st.session_state.pdf_path, chunk_size, chunk_overlap)
-                st.session_state.vectorstore = vector_store.create_vector_store(text_chunks)
-                st.session_state.images = pdf_processor.extract_images_from_pdf(st.session_state.pdf_path)
-            st.success(f"PDF processed! Found {len(st.session_state.images)} images.")
-            st.session_state.chat_history = [] # Reset chat
+                if not st.session_state.doc_hash:
+                    st.session_state.doc_hash = upload_store.file_digest(st.session_state.pdf_path)
+                try:
+                    processed = process_document(
+                        st.session_state.doc_hash, chunk_size, chunk_overlap, st.session_state.pdf_path
+                    )
+                except ingest.IngestError as e:
+                    processed = None
+                    st.error(f"Could not process this PDF: {e}")
+            if processed is not None:
+                st.session_state.vectorstore = processed['vectorstore']
+                st.session_state.images = processed['images']
+                st.session_state.tables = processed['tables']
+                st.session_state.image_index = processed['image_index']
+                st.session_state.chunking = (chunk_size, chunk_overlap)
+                st.session_state.document = (st.session_state.pdf_path, st.session_state.doc_hash)
+                ingest_stats = processed['stats']
+                st.success(
+                    f"PDF processed! Found {len(st.session_state.images)} images and {ingest_stats.get('tables', 0)} tables."
+                )
+                for warning in processed['warnings']:
+                    st.warning(warning)
+                if ingest_stats.get('bundle'):
+                    st.sidebar.info("Opened prebuilt bundle (no parsing or embedding needed).")
+                if ingest_stats.get('ocr_pages'):
+                    st.sidebar.info(
+                        f"OCR: {ingest_stats['ocr_pages']} scanned pages ({ingest_stats['ocr_cached']} cached), "
+                        f"{ingest_stats['ocr_pages_per_sec']:.1f} pages/s"
+                    )
+                st.session_state.chat_history = [] # Reset chat
         else:
             st.warning("Please select a valid PDF file first.")
 
+    if config.SHOW_IMPORT_PROFILE and lazy_imports.load_times():
+        with st.sidebar.expander("Import profile"):
+            for name, seconds in lazy_imports.load_times().items():
+                st.text(f"{name}: {seconds:.2f}s")
+
+    if config.SHOW_MODEL_STATS and "llm_handler" in lazy_imports.load_times():
+        with st.sidebar.expander("Model load"):
+            for model, stats in llm_handler.router.stats().items():
+                st.text(
+                    f"{model}: {stats['calls']} calls, {stats['errors']} errors, "
+                    f"{stats['in_flight']} in flight, {stats['latency_ewma']:.1f}s avg"
+                )
+            embed_stats = vector_store.get_embeddings().stats()
+            st.text(
+                f"query embedding: {embed_stats['queries_per_sec']:.1f} q/s, "
+                f"{embed_stats['cache_hits']}/{embed_stats['queries']} cached, "
+                f"batch {embed_stats['avg_batch_size']:.1f}, queue p95 {embed_stats['queue_delay_p95_ms']:.1f} ms"
+            )
+            if st.session_state.get('prefetcher'):
+                prefetch_stats = st.session_state.prefetcher.stats()
+                st.text(
+                    f"prefetch: {prefetch_stats['hits']}/{prefetch_stats['lookups']} questions ready "
+                    f"({prefetch_stats['hit_rate']:.0%}), {prefetch_stats['wasted']}/"
+                    f"{prefetch_stats['max_wasted']} unused"
+                )
+
 # --- Main Chat Interface ---
 def main_interface():
     """Renders the main chat interface using tabs."""
@@ -67,44 +212,148 @@ def main_interface():
         st.info("👋 Welcome! Please upload or select a PDF and click 'Process PDF' to begin.")
         return
 
-    tab1, tab2 = st.tabs(["💬 Chat with Text", "🖼️ Chat with Images"])
+    tab1, tab2, tab3 = st.tabs(["💬 Chat with Text", "🖼️ Chat with Images", "📑 Chat with Pages"])
 
     with tab1:
         st.subheader("Query the PDF's Text Content")
+        prefetcher = get_prefetcher()
         for msg in st.session_state.chat_history:
             with st.chat_message(msg["role"]):
                 st.markdown(msg["content"])
+                if "usage" in msg:
+                    st.caption(msg["usage"])
+
+        prompt = st.session_state.pop('queued_prompt', None)
+        if st.session_state.follow_ups:
+            for col, suggestion in zip(st.columns(len(st.session_state.follow_ups)), st.session_state.follow_ups):
+                col.button(suggestion, on_click=queue_prompt, args=(suggestion,), use_container_width=True)
 
-        if prompt := st.chat_input("Ask a question about the PDF..."):
+        if prefetcher and config.PREFETCH_WHILE_TYPING and st_keyup is not None:
+            draft = st_keyup(
+                "Ask a question about the PDF...", debounce=config.PREFETCH_DEBOUNCE_MS,
+                key=f"draft_{len(st.session_state.chat_history)}"
+            )
+            if draft:
+                prefetcher.prefetch(draft)
+            if st.button("Send", type="primary") and draft:
+                prompt = draft
+        elif typed := st.chat_input("Ask a question about the PDF..."):
+            prompt = typed
+
+        if prompt:
             st.session_state.chat_history.append({"role": "user", "content": prompt})
             with st.chat_message("user"):
                 st.markdown(prompt)
 
             with st.chat_message("assistant"):
                 with st.spinner("Thinking..."):
+                    stats = {}
                     response = llm_handler.get_text_chat_response(
-                        st.session_state.vectorstore, prompt, st.session_state.chat_history
+                        st.session_state.vectorstore, prompt, st.session_state.chat_history, stats,
+                        retrieved=prefetcher.take(prompt) if prefetcher else None, tables=st.session_state.tables
                     )
                     st.markdown(response)
-            st.session_state.chat_history.append({"role": "assistant", "content": response})
+                    if stats.get('table_answer'):
+                        usage = "Answered from an extracted table (no LLM call)"
+                    else:
+                        usage = (
+                            f"Context: {stats.get('context_tokens', 0)}/{stats.get('token_budget', 0)} tokens "
+                            f"· k={stats.get('k', 0)} · prompt ≈ {stats.get('prompt_tokens', 0)} tokens"
+                            + (f" · {stats['table_rows']} table rows" if stats.get('table_rows') else "")
+                            + (" · context prefetched" if stats.get('prefetched') else "")
+                        )
+                    st.caption(usage)
+                    if config.SESSION_LOG_ENABLED and st.session_state.document:
+                        processed_path, processed_hash = st.session_state.document
+                        session_log.recorder.record(
+                            st.session_state.session_id,
+                            {'path': os.path.abspath(processed_path), 'hash': processed_hash},
+                            session_log.settings_snapshot(*st.session_state.chunking),
+                            prompt, st.session_state.chat_history[:-1], stats
+                        )
+            st.session_state.chat_history.append({"role": "assistant", "content": response, "usage": usage})
+            if prefetcher and 'error' not in stats:
+                st.session_state.follow_ups = prefetch.suggest_follow_ups(prompt, response, config.PREFETCH_FOLLOW_UPS)
+                for suggestion in st.session_state.follow_ups:
+                    prefetcher.prefetch(suggestion)
+                st.rerun()  # Show the follow-up suggestions under the new answer
 
     with tab2:
         st.subheader("Query Images in the PDF")
-        if not st.session_state.images:
+        figures = st.session_state.image_index
+        if not figures:
             st.warning("No images were found in this PDF.")
         else:
-            img_choices = {f"Page {p_num}, Image {idx}": img for p_num, idx, img in st.session_state.images}
-            selected_key = st.selectbox("Select an image:", img_choices.keys())
-            if selected_key:
-                selected_img = img_choices[selected_key]
-                st.image(selected_img, caption=f"Selected: {selected_key}", use_column_width=True)
-                if img_prompt := st.text_input("Ask a question about this image:", key=selected_key):
-                    with st.spinner("Analyzing image..."):
+            col1, col2 = st.columns(2)
+            description = col1.text_input(
+                "Find figures by description:", disabled=not figures.searchable,
+                placeholder="e.g. bar chart of revenue by quarter"
+            )
+            example = col2.file_uploader("...or drag and drop a similar image (PNG, JPG, JPEG):", type=["png", "jpg", "jpeg"])
+
+            hits = None
+            start = time.perf_counter()
+            if example is not None:
+                try:
+                    hits = figures.search_image(Image.open(example), config.IMAGE_SEARCH_RESULTS)
+                except Exception as e:
+                    st.error(f"Could not read the uploaded image: {e}")
+            elif description:
+                hits = figures.search_text(description, config.IMAGE_SEARCH_RESULTS)
+
+            if hits is not None:
+                st.caption(f"{len(hits)} matching figures in {(time.perf_counter() - start) * 1000:.0f} ms")
+                columns = st.columns(4)
+                for n, (i, _) in enumerate(hits):
+                    columns[n % 4].image(figures.entries[i][2], caption=figures.label(i), use_column_width=True)
+            choices = [i for i, _ in hits] if hits else list(range(len(figures)))
+            selected = st.selectbox("Select an image:", choices, format_func=figures.label)
+            if selected is not None:
+                selected_img = figures.entries[selected][2]
+                st.image(selected_img, caption=f"Selected: {figures.label(selected)}", use_column_width=True)
+                if img_prompt := st.text_input("Ask a question about this image:", key=f"image_{selected}"):
+                    with st.spinner(f"Analyzing image with {config.VISION_MODEL}..."):
                         response = llm_handler.query_ollama_with_image(selected_img, img_prompt)
                         st.info(response)
 
+    with tab3:
+        st.subheader("Query a Rendered Page or Region")
+        path, doc_hash = st.session_state.document or (None, None)
+        if not path or not doc_hash or not os.path.exists(path):
+            st.warning("The PDF file is no longer available. Upload it again to view its pages.")
+            return
+        num_pages = page_renderer.page_count(path)
+        page_num = st.number_input("Page", 1, num_pages, 1) - 1
+        for neighbour in (page_num - 1, page_num + 1):  # Pre-render adjacent pages in the background
+            if 0 <= neighbour < num_pages:
+                page_renderer.render_page_async(path, doc_hash, neighbour)
+
+        col1, col2 = st.columns(2)
+        x_range = col1.slider("Horizontal crop", 0.0, 1.0, (0.0, 1.0), 0.05)
+        y_range = col2.slider("Vertical crop", 0.0, 1.0, (0.0, 1.0), 0.05)
+        if x_range[1] <= x_range[0] or y_range[1] <= y_range[0]:
+            st.warning("The crop region is empty.")
+            return
+        with st.spinner("Rendering page..."):
+            region = page_renderer.render_page(
+                path, doc_hash, page_num, box=(x_range[0], y_range[0], x_range[1], y_range[1])
+            )
+        st.image(region, caption=f"Page {page_num + 1}", use_column_width=True)
+        if page_prompt := st.text_input("Ask a question about this region:", key=f"page_{page_num}"):
+            with st.spinner(f"Analyzing page with {config.VISION_MODEL}..."):
+                response = llm_handler.query_ollama_with_image(region, page_prompt)
+                st.info(response)
+
 # --- App Execution ---
 if __name__ == "__main__":
+    if config.WARM_UP_IMPORTS:
+        lazy_imports.warm_up(
+            ["pdf_processor", "vector_store", "llm_handler"],
+            after=(lambda: llm_handler.router.warm_up()) if config.WARM_UP_MODELS else None
+        )
     initialize_session_state()
+    processed_path = st.session_state.document[0] if st.session_state.document else None
+    for in_use in {st.session_state.pdf_path, processed_path} - {None}:
+        upload_store.store.touch(in_use)
     setup_sidebar()
     main_interface()
\ No newline at end of file
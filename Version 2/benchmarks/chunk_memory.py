@@ -0,0 +1,46 @@
+# benchmarks/chunk_memory.py
+#
+# Compares per-chunk memory of LangChain Documents with the compact ChunkStore.
+# Usage: python benchmarks/chunk_memory.py path/to/file.pdf [--chunk-size 1000] [--chunk-overlap 200]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import pdf_processor
+from chunk_store import ChunkStore, documents_nbytes
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk metadata memory: Documents vs ChunkStore")
+    parser.add_argument("pdf")
+    parser.add_argument("--chunk-size", type=int, default=config.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=config.DEFAULT_CHUNK_OVERLAP)
+    args = parser.parse_args()
+
+    documents = pdf_processor.extract_text_and_split(args.pdf, args.chunk_size, args.chunk_overlap)
+    store = ChunkStore.from_documents(documents)
+    n = max(1, len(documents))
+
+    before = documents_nbytes(documents)
+    after = store.nbytes()
+    print(f"chunks:               {len(documents)}")
+    print(f"Document objects:     {before:>12,} bytes ({before / n:,.0f} per chunk)")
+    print(f"ChunkStore:           {after:>12,} bytes ({after / n:,.0f} per chunk)")
+    print(f"reduction:            {before / max(1, after):.1f}x")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store.save(tmp)
+        start = time.perf_counter()
+        mapped = ChunkStore.load(tmp)
+        print(f"mmap load:            {(time.perf_counter() - start) * 1000:.2f} ms for {len(mapped)} chunks")
+        if documents:
+            assert mapped.chunk_text(0) == documents[0].page_content
+        del mapped
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/chunking.py
+#
+# Times the whole-document chunker against per-page RecursiveCharacterTextSplitter.
+# Usage: python benchmarks/chunking.py [--pages 1000] [--pdf path/to/file.pdf]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import chunker
+from langchain_core.documents import Document
+
+def synthetic_pages(num_pages: int, seed: int = 0) -> list:
+    """Deterministic ~3,000-character pages laid out like PDF-extracted text: hard-wrapped lines, single newlines."""
+    rng = random.Random(seed)
+    words = [f"w{i}" + "x" * rng.randint(0, 8) for i in range(5000)]
+    pages = []
+    for _ in range(num_pages):
+        sentences = [" ".join(rng.choices(words, k=rng.randint(6, 25))).capitalize() + "." for _ in range(rng.randint(20, 30))]
+        text = " ".join(sentences)
+        pages.append("\n".join(text[i:i + 90] for i in range(0, len(text), 90)))
+    return pages
+
+def best_of(repeat: int, fn):
+    """Runs `fn` `repeat` times and returns the fastest wall time with the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    from langchain.text_splitter import RecursiveCharacterTextSplitter  # Baseline only; keeps synthetic_pages importable
+
+    parser = argparse.ArgumentParser(description="Chunking speed: whole-document chunker vs LangChain splitter")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--pdf", help="Benchmark on a real PDF's page texts instead of synthetic pages")
+    parser.add_argument("--chunk-size", type=int, default=config.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=config.DEFAULT_CHUNK_OVERLAP)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.pdf:
+        import pdf_processor
+        page_texts = pdf_processor.load_page_texts(args.pdf)
+    else:
+        page_texts = synthetic_pages(args.pages)
+    source = args.pdf or "synthetic.pdf"
+    print(f"pages: {len(page_texts)}, characters: {sum(map(len, page_texts)):,}")
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap, add_start_index=True
+    )
+    baseline_time, baseline = best_of(args.repeat, lambda: splitter.split_documents(
+        [Document(page_content=text, metadata={'source': source, 'page': i}) for i, text in enumerate(page_texts)]
+    ))
+    chunker_time, chunks = best_of(args.repeat, lambda: chunker.chunk_documents(
+        page_texts, source, args.chunk_size, args.chunk_overlap
+    ))
+
+    cross_page = sum(doc.metadata['end_page'] != doc.metadata['page'] for doc in chunks)
+    print(f"RecursiveCharacterTextSplitter: {baseline_time * 1000:8.1f} ms, {len(baseline)} chunks")
+    print(f"chunker.chunk_documents:        {chunker_time * 1000:8.1f} ms, {len(chunks)} chunks "
+          f"({cross_page} spanning pages)")
+    print(f"speedup: {baseline_time / max(chunker_time, 1e-9):.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/embedding_backends.py
+#
+# Compares embedding backends (PyTorch, ONNX Runtime fp32, ONNX int8) on document throughput and
+# on how closely their vectors match the PyTorch ones: per-chunk cosine similarity, top-k overlap of
+# searches against their own index, and top-k overlap when their query vectors search the PyTorch index
+# (i.e. whether an existing index can be kept after switching backends).
+# Usage: python benchmarks/embedding_backends.py [--pdf file.pdf] [--pages 50] [--threads 0] [--k 5]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import config
+import chunker
+
+BACKENDS = ['torch', 'onnx', 'onnx-int8']
+
+def top_k(index_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k nearest index vectors for each query (vectors are unit length, so by dot product)."""
+    return np.argsort(-query_vectors @ index_vectors.T, axis=1)[:, :k]
+
+def overlap(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean([len(set(x) & set(y)) / len(x) for x, y in zip(a.tolist(), b.tolist())]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend throughput and vector agreement")
+    parser.add_argument("--pdf", help="Embed this PDF's chunks instead of synthetic pages")
+    parser.add_argument("--pages", type=int, default=50, help="Synthetic pages when no PDF is given")
+    parser.add_argument("--chunk-size", type=int, default=config.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=config.EMBEDDING_THREADS, help="ONNX Runtime intra-op threads")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    args = parser.parse_args()
+
+    config.EMBEDDING_THREADS = args.threads
+    import vector_store
+
+    if args.pdf:
+        import pdf_processor
+        page_texts = pdf_processor.load_page_texts(args.pdf)
+    else:
+        from chunking import synthetic_pages
+        page_texts = synthetic_pages(args.pages)
+    buffer, page_starts = chunker.build_buffer(page_texts)
+    texts = [doc.page_content for doc in chunker.chunk_buffer(buffer, page_starts, "bench", args.chunk_size, 0)]
+    sentences = [s.strip() for s in buffer.replace("\n", " ").split(". ") if len(s.split()) >= 6]
+    queries = random.Random(0).sample(sentences, min(args.queries, len(sentences)))
+    print(f"{len(texts)} chunks, {len(queries)} queries, top-{args.k}\n")
+
+    results = {}
+    for backend in args.backends:
+        model = vector_store.load_embedding_model(backend)
+        model.embed_documents(texts[:8])  # Warm up (graph optimisation, thread pools)
+        start = time.perf_counter()
+        docs = np.array(model.embed_documents(texts), dtype=np.float32)
+        seconds = time.perf_counter() - start
+        query_vectors = np.array([model.embed_query(q) for q in queries], dtype=np.float32)
+        results[backend] = (docs, query_vectors, seconds)
+
+    baseline = results.get('torch')
+    print(f"{'backend':<11}{'chunks/s':>10}{'speedup':>9}{'cosine mean':>13}{'cosine min':>12}"
+          f"{'top-k own':>11}{'top-k torch idx':>17}")
+    for backend, (docs, query_vectors, seconds) in results.items():
+        row = f"{backend:<11}{len(texts) / seconds:>10.1f}"
+        if baseline is None:
+            print(row)
+            continue
+        base_docs, base_queries, base_seconds = baseline
+        cosine = np.sum(docs * base_docs, axis=1)
+        reference = top_k(base_docs, base_queries, args.k)
+        row += (f"{base_seconds / seconds:>8.1f}x{cosine.mean():>13.4f}{cosine.min():>12.4f}"
+                f"{overlap(top_k(docs, query_vectors, args.k), reference):>11.3f}"
+                f"{overlap(top_k(base_docs, query_vectors, args.k), reference):>17.3f}")
+        print(row)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/fake_ollama.py
+#
+# Minimal stand-in for the Ollama HTTP API (/api/chat, /api/generate) with configurable latency,
+# prompt/generation token rates and error rate, so the chat path can be exercised without a GPU or real models.
+# Usage: python benchmarks/fake_ollama.py [--port 11435] [--latency-ms 200] [--tokens-per-sec 40]
+# then point the app at it with OLLAMA_HOST=http://127.0.0.1:11435
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # The default backlog of 5 drops connections under load (1s SYN retries)
+
+class FakeOllama:
+    """Threaded HTTP server answering Ollama chat/generate requests with canned text."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 11435, latency_ms: float = 200.0,
+                 tokens_per_sec: float = 40.0, response_tokens: int = 64, error_rate: float = 0.0,
+                 prompt_tokens_per_sec: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.tokens_per_sec = tokens_per_sec
+        self.prompt_tokens_per_sec = prompt_tokens_per_sec  # 0 = prompt processing is free
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _reply(self, request: dict) -> dict:
+        prompt = json.dumps(request.get('messages') or request.get('prompt', ""))
+        prompt_tokens = len(prompt) // 4
+        generate_seconds = self.response_tokens / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+        if self.prompt_tokens_per_sec > 0:
+            generate_seconds += prompt_tokens / self.prompt_tokens_per_sec
+        time.sleep(self.latency + generate_seconds)
+        return {
+            'model': request.get('model', "fake"),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'done': True,
+            'done_reason': "stop",
+            'prompt_eval_count': prompt_tokens,
+            'eval_count': self.response_tokens,
+            'total_duration': int((self.latency + generate_seconds) * 1e9),
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send(200, {'version': "0.0.0-fake"})
+                else:
+                    self._send(200, {'models': []})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                if random.random() < fake.error_rate:
+                    self._send(500, {'error': "fake overload"})
+                    return
+                reply = fake._reply(request)
+                text = " ".join(["token"] * fake.response_tokens)
+                if self.path == "/api/chat":
+                    reply['message'] = {'role': "assistant", 'content': text}
+                elif self.path == "/api/generate":
+                    reply['response'] = text if request.get('prompt') else ""
+                else:
+                    self._send(404, {'error': f"unknown endpoint {self.path}"})
+                    return
+                if request.get('stream', True):
+                    # Ollama streams NDJSON by default; a single final chunk is enough for clients.
+                    body = (json.dumps(reply) + "\n").encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self._send(200, reply)
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for load and replay tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=40.0)
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOllama(args.host, args.port, args.latency_ms, args.tokens_per_sec,
+                        args.response_tokens, args.error_rate, args.prompt_tokens_per_sec).start()
+    print(f"Fake Ollama listening on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
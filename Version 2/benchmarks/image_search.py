@@ -0,0 +1,84 @@
+# benchmarks/image_search.py
+#
+# Builds the figure index for a PDF's images (or synthetic figures with planted copies) and reports
+# near-duplicate collapse, build time, and per-query latency of text and similar-image search.
+# Usage: python benchmarks/image_search.py [--pdf file.pdf] [--figures 300] [--queries 50]
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageOps
+import config
+import image_index
+from load_test import percentile
+
+DESCRIPTIONS = ["a bar chart", "a line plot over time", "a photo of a machine", "a table of numbers",
+                "a flow diagram with arrows", "a company logo", "a scatter plot", "a map"]
+
+def synthetic_figures(count: int, seed: int = 0) -> list:
+    """Random box drawings, every tenth re-saved as a rescaled JPEG copy of an earlier one."""
+    rng = random.Random(seed)
+    figures = []
+    for n in range(count):
+        if n % 10 == 9:
+            page_num, img_index, source = figures[rng.randrange(len(figures))]
+            buffer = io.BytesIO()
+            source.resize((source.width * 3 // 2, source.height * 3 // 2)).save(buffer, "JPEG", quality=60)
+            figures.append((n // 4 + 1, n % 4 + 1, Image.open(io.BytesIO(buffer.getvalue()))))
+            continue
+        image = Image.new("RGB", (320, 240), "white")
+        draw = ImageDraw.Draw(image)
+        for _ in range(10):
+            x, y = rng.randrange(300), rng.randrange(220)
+            color = tuple(rng.randrange(256) for _ in range(3))
+            draw.rectangle([x, y, x + rng.randint(10, 90), y + rng.randint(10, 90)], fill=color)
+        figures.append((n // 4 + 1, n % 4 + 1, image))
+    return figures
+
+def timed(fn, items: list) -> list:
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item, config.IMAGE_SEARCH_RESULTS)
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="Figure index build time and search latency")
+    parser.add_argument("--pdf", help="Index this PDF's images instead of synthetic figures")
+    parser.add_argument("--figures", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.pdf:
+        import pdf_processor
+        figures = pdf_processor.open_images(pdf_processor.extract_images_from_pdf(args.pdf))
+    else:
+        figures = synthetic_figures(args.figures)
+
+    stats = {}
+    start = time.perf_counter()
+    index = image_index.ImageIndex.build(figures, stats)
+    build_seconds = time.perf_counter() - start
+    print(f"figures: {len(figures)}, indexed: {stats['images_indexed']}, near-duplicates collapsed: "
+          f"{stats['image_duplicates']}, build: {build_seconds:.2f}s, embeddings: {index.searchable}")
+
+    rng = random.Random(1)
+    probes = [ImageOps.autocontrast(image.convert("RGB").resize((image.width // 2 or 1, image.height // 2 or 1)))
+              for _, _, image in rng.choices(figures, k=args.queries)]
+    image_latencies = timed(index.search_image, probes)
+    print(f"similar-image search: p50 {percentile(image_latencies, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentile(image_latencies, 0.95) * 1000:.1f} ms")
+    if index.searchable:
+        text_latencies = timed(index.search_text, [rng.choice(DESCRIPTIONS) for _ in range(args.queries)])
+        print(f"text search:          p50 {percentile(text_latencies, 0.5) * 1000:.1f} ms, "
+              f"p95 {percentile(text_latencies, 0.95) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/load_test.py
+#
+# Drives the retrieval + chat path used by app.main_interface with N concurrent simulated
+# sessions against a local fake Ollama, and reports latency percentiles, throughput,
+# error rate and memory growth.
+# Usage: python benchmarks/load_test.py [--users 100] [--questions 5] [--pdf file.pdf] [--mix mix.json]
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from fake_ollama import FakeOllama
+
+# Question category -> (weight, templates). Override with --mix pointing at a JSON file of the same shape.
+DEFAULT_MIX = {
+    'lookup': [0.6, ["What is {topic}?", "Where does the document mention {topic}?", "Define {topic}."]],
+    'summary': [0.3, ["Summarize what the document says about {topic}.", "Give an overview of {topic}."]],
+    'follow_up': [0.1, ["Can you explain that in more detail?", "Why is that important?"]],
+}
+TOPICS = ["revenue", "torque", "attention", "gradient", "warranty", "latency", "dataset", "pricing"]
+
+def rss_bytes() -> int:
+    """Current resident set size (falls back to peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def percentile(values: list, p: float) -> float:
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+def build_vectorstore(pdf: str, chunk_size: int, chunk_overlap: int):
+    import chunker
+    import pdf_processor
+    import vector_store
+
+    if pdf:
+        buffer, page_starts, chunks = pdf_processor.extract_document(pdf, chunk_size, chunk_overlap)
+    else:
+        from chunking import synthetic_pages
+        buffer, page_starts = chunker.build_buffer(synthetic_pages(50))
+        chunks = chunker.chunk_buffer(buffer, page_starts, "synthetic.pdf", chunk_size, chunk_overlap)
+    return vector_store.create_vector_store(chunks, buffer=buffer, page_starts=page_starts)
+
+def run_session(session_id: int, vectorstore, args, mix: dict, results: list, lock: threading.Lock):
+    """One simulated user: asks questions drawn from the mix, pausing for a random think time between them."""
+    import llm_handler
+
+    rng = random.Random(args.seed + session_id)
+    categories = list(mix)
+    weights = [mix[c][0] for c in categories]
+    chat_history = []
+    for _ in range(args.questions):
+        category = rng.choices(categories, weights)[0]
+        question = rng.choice(mix[category][1]).format(topic=rng.choice(TOPICS))
+        chat_history.append({"role": "user", "content": question})
+        stats = {}
+        start = time.perf_counter()
+        response = llm_handler.get_text_chat_response(vectorstore, question, chat_history, stats)
+        elapsed = time.perf_counter() - start
+        chat_history.append({"role": "assistant", "content": response})
+        with lock:
+            results.append({'category': category, 'latency': elapsed, 'error': 'error' in stats})
+        time.sleep(rng.expovariate(1 / args.think_time) if args.think_time > 0 else 0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent chat-session load test against a fake Ollama")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=5, help="Questions per session")
+    parser.add_argument("--think-time", type=float, default=2.0, help="Mean seconds between questions")
+    parser.add_argument("--mix", help="JSON file mapping category -> [weight, [question templates]]")
+    parser.add_argument("--pdf", help="Index this PDF instead of synthetic pages")
+    parser.add_argument("--chunk-size", type=int, default=config.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=config.DEFAULT_CHUNK_OVERLAP)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fake Ollama time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=40.0, help="Fake Ollama generation speed")
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake Ollama calls that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        with open(args.mix, encoding="utf-8") as f:
+            mix = json.load(f)
+
+    server = FakeOllama(port=0, latency_ms=args.latency_ms, tokens_per_sec=args.tokens_per_sec,
+                        response_tokens=args.response_tokens, error_rate=args.error_rate).start()
+    os.environ["OLLAMA_HOST"] = server.url  # Must be set before `ollama` is first imported
+
+    import llm_handler  # Import before the sessions start so module loading isn't timed as latency
+
+    vectorstore = build_vectorstore(args.pdf, args.chunk_size, args.chunk_overlap)
+    llm_handler.get_text_chat_response(vectorstore, "warm up", [])
+    rss_start = rss_bytes()
+    rss_peak = rss_start
+    results, lock = [], threading.Lock()
+    sessions = [
+        threading.Thread(target=run_session, args=(i, vectorstore, args, mix, results, lock))
+        for i in range(args.users)
+    ]
+
+    start = time.perf_counter()
+    for session in sessions:
+        session.start()
+    while any(session.is_alive() for session in sessions):
+        rss_peak = max(rss_peak, rss_bytes())
+        time.sleep(0.2)
+    elapsed = time.perf_counter() - start
+    server.stop()
+
+    latencies = sorted(r['latency'] for r in results)
+    errors = sum(r['error'] for r in results)
+    print(f"sessions: {args.users}, requests: {len(results)}, wall time: {elapsed:.1f}s")
+    print(f"latency p50 {percentile(latencies, 0.50) * 1000:.0f} ms, p95 {percentile(latencies, 0.95) * 1000:.0f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.0f} ms")
+    print(f"throughput: {len(results) / elapsed:.2f} requests/s")
+    print(f"errors: {errors} ({errors / max(1, len(results)):.1%})")
+    print(f"memory: RSS {rss_start / 2**20:.0f} MiB -> peak {rss_peak / 2**20:.0f} MiB "
+          f"(+{(rss_peak - rss_start) / 2**20:.0f} MiB), end {rss_bytes() / 2**20:.0f} MiB")
+    for category in mix:
+        values = sorted(r['latency'] for r in results if r['category'] == category)
+        if values:
+            print(f"  {category:<10} n={len(values):<5} p50 {percentile(values, 0.5) * 1000:.0f} ms "
+                  f"p95 {percentile(values, 0.95) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
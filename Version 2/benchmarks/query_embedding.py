@@ -0,0 +1,72 @@
+# benchmarks/query_embedding.py
+#
+# Query-embedding throughput under concurrency: one forward pass per query vs batched queries.
+# Usage: python benchmarks/query_embedding.py [--users 32] [--queries 20] [--max-wait-ms 5]
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from embedding_service import BatchingQueryEmbedder
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+TOPICS = ["revenue", "torque", "attention", "gradient", "warranty", "latency", "dataset", "pricing"]
+
+def run_load(embedder, users: int, queries_per_user: int, seed: int = 0) -> dict:
+    """Each simulated user embeds distinct queries back to back; returns throughput and latency percentiles."""
+    latencies = []
+    lock = threading.Lock()
+
+    def user(uid: int):
+        rng = random.Random(seed + uid)
+        for i in range(queries_per_user):
+            query = f"what does the document say about {rng.choice(TOPICS)} in section {uid}.{i}?"
+            start = time.perf_counter()
+            embedder.embed_query(query)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=user, args=(uid,)) for uid in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'queries_per_sec': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Query embedding throughput: single vs batched")
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=20, help="Queries per user")
+    parser.add_argument("--max-wait-ms", type=float, default=config.QUERY_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    model = HuggingFaceEmbeddings(model_name=config.EMBEDDING_MODEL_NAME)
+    model.embed_query("warm up")
+
+    single = run_load(model, args.users, args.queries)
+    batched_embedder = BatchingQueryEmbedder(model, args.max_wait_ms, config.QUERY_BATCH_MAX_SIZE, cache_size=0)
+    batched = run_load(batched_embedder, args.users, args.queries)
+    stats = batched_embedder.stats()
+
+    for name, result in (("single", single), ("batched", batched)):
+        print(f"{name:<8} {result['queries_per_sec']:8.1f} q/s   p50 {result['p50_ms']:7.1f} ms   "
+              f"p95 {result['p95_ms']:7.1f} ms")
+    print(f"batches: {stats['batches']}, avg size {stats['avg_batch_size']:.1f}, queue delay "
+          f"p50 {stats['queue_delay_p50_ms']:.1f} ms / p95 {stats['queue_delay_p95_ms']:.1f} ms "
+          f"(window cap {args.max_wait_ms} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# benchmarks/replay.py
+#
+# Replays recorded chat sessions (see session_log.py; record with config.SESSION_LOG_ENABLED) offline,
+# once with the settings they were recorded under and once with candidate settings, against a fake
+# Ollama that charges for prompt tokens. Reports recall of the recorded retrieved text, prompt-token
+# change and p50 latency per stage, and exits with status 1 when a stage slows down by more than its
+# allowed share (config.REPLAY_MAX_SLOWDOWN) or recall falls below config.REPLAY_MIN_RECALL.
+# Usage: python benchmarks/replay.py [sessions.jsonl] [--set RETRIEVAL_MAX_K=5 ...] [--max-slowdown total=0.1 ...]
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+import session_log
+from fake_ollama import FakeOllama
+
+DOCUMENT_STAGES = ('ingest', 'index')
+
+def parse_pairs(pairs: list, parse) -> dict:
+    """NAME=VALUE arguments as a dict, values converted with `parse`."""
+    parsed = {}
+    for pair in pairs:
+        name, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"Expected NAME=VALUE, got {pair!r}")
+        parsed[name] = parse(value)
+    return parsed
+
+def setting_value(value: str):
+    """JSON values (numbers, booleans, quoted strings, dicts) as such, anything else as a plain string."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def _merged(spans: list) -> list:
+    merged = []
+    for start, end in sorted((s['start'], s['end']) for s in spans if s['start'] >= 0):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def recall(reference: list, candidate: list) -> float:
+    """Share of the reference's retrieved characters that the candidate retrieved too.
+
+    Compares character spans rather than chunk ids, so it stays meaningful when chunking changes.
+    """
+    ref, cand = _merged(reference), _merged(candidate)
+    total = sum(end - start for start, end in ref)
+    if not total:
+        return 1.0
+    covered = sum(max(0, min(end, c_end) - max(start, c_start)) for start, end in ref for c_start, c_end in cand)
+    return covered / total
+
+def selected(result: dict) -> list:
+    """The retrieved spans that made it into the prompt (the closest `k`)."""
+    return result['retrieved'][:result['k']] if result['k'] else result['retrieved']
+
+def apply_settings(settings: dict):
+    import vector_store
+    embedding = (config.EMBEDDING_MODEL_NAME, config.EMBEDDING_BACKEND, config.EMBEDDING_MAX_TOKENS)
+    for name, value in settings.items():
+        setattr(config, name, value)
+    if embedding != (config.EMBEDDING_MODEL_NAME, config.EMBEDDING_BACKEND, config.EMBEDDING_MAX_TOKENS):
+        vector_store.reset_embeddings()  # Vector stores built earlier keep the model they were built with
+
+def build(path: str, settings: dict) -> tuple:
+    """Parses and indexes `path` under `settings`; returns the vector store, tables and stage timings."""
+    import ingest
+    import vector_store
+
+    apply_settings(settings)
+    start = time.perf_counter()
+    parsed = ingest.ingest_pdf(path, config.DEFAULT_CHUNK_SIZE, config.DEFAULT_CHUNK_OVERLAP, isolate=False)
+    ingest_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    vectorstore = vector_store.create_vector_store(
+        parsed['chunks'], compact=config.COMPACT_CHUNK_STORE, buffer=parsed['buffer'], page_starts=parsed['page_starts']
+    )
+    index_ms = (time.perf_counter() - start) * 1000
+    tables = parsed['tables'] if config.TABLES_ENABLED else None
+    return vectorstore, tables, {'ingest': ingest_ms, 'index': index_ms}
+
+def ask(vectorstore, tables, settings: dict, record: dict) -> dict:
+    import llm_handler
+
+    apply_settings(settings)
+    history = record['history'] + [{'role': 'user', 'content': record['query']}]
+    stats = {}
+    llm_handler.get_text_chat_response(vectorstore, record['query'], history, stats, tables=tables)
+    return stats
+
+def summarize(runs: list) -> dict:
+    """One record's replay: retrieval and prompt from the first run, the median of each stage over all runs."""
+    first = runs[0]
+    return {
+        'retrieved': first.get('retrieved', []),
+        'k': first.get('k', 0),
+        'prompt_tokens': first.get('prompt_tokens', 0),
+        'error': first.get('error'),
+        'timings': {
+            stage: statistics.median(run[f"{stage}_ms"] for run in runs)
+            for stage in session_log.STAGES if all(f"{stage}_ms" in run for run in runs)
+        },
+    }
+
+def p50(values: list) -> float:
+    return statistics.median(values) if values else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions against candidate settings")
+    parser.add_argument("log", nargs="?", default=config.SESSION_LOG_PATH, help="Session log (JSON lines)")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="NAME=VALUE",
+                        help="Candidate setting (any config name; values are parsed as JSON when possible)")
+    parser.add_argument("--max-slowdown", action="append", default=[], metavar="STAGE=FRACTION",
+                        help="Allowed p50 increase for a stage (ingest, index, retrieval, context, llm, total)")
+    parser.add_argument("--min-slowdown-ms", type=float, default=config.REPLAY_MIN_SLOWDOWN_MS)
+    parser.add_argument("--min-recall", type=float, default=config.REPLAY_MIN_RECALL)
+    parser.add_argument("--repeat", type=int, default=3, help="Times each question is asked per configuration")
+    parser.add_argument("--limit", type=int, help="Replay only the first N recorded questions")
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=2000.0, help="Fake Ollama prompt processing speed")
+    args = parser.parse_args()
+
+    overrides = parse_pairs(args.overrides, setting_value)
+    unknown = [name for name in overrides if not hasattr(config, name)]
+    if unknown:
+        raise SystemExit(f"Unknown setting(s): {', '.join(unknown)}")
+    defaults = {name: getattr(config, name) for name in overrides}  # Baseline values of settings not recorded
+    thresholds = {**config.REPLAY_MAX_SLOWDOWN, **parse_pairs(args.max_slowdown, float)}
+
+    records = session_log.read_records(args.log)[:args.limit]
+    groups = OrderedDict()  # (document, recorded settings) -> records
+    for record in records:
+        if not os.path.exists(record['document']['path']):
+            print(f"Skipping question, document no longer exists: {record['document']['path']}")
+            continue
+        key = (record['document']['path'], json.dumps(record['settings'], sort_keys=True))
+        groups.setdefault(key, []).append(record)
+    if not groups:
+        raise SystemExit(f"No replayable questions in {args.log}")
+
+    server = FakeOllama(port=0, latency_ms=20, tokens_per_sec=0, prompt_tokens_per_sec=args.prompt_tokens_per_sec).start()
+    os.environ["OLLAMA_HOST"] = server.url  # Must be set before `ollama` is first imported
+    config.QUERY_CACHE_SIZE = 0  # Both configurations must embed every query themselves
+
+    replayed, document_timings = [], {'baseline': [], 'candidate': []}
+    for (path, _), group in groups.items():
+        variants = {'baseline': {**defaults, **group[0]['settings']}}
+        variants['candidate'] = {**variants['baseline'], **overrides}
+        with open(path, "rb") as f:
+            f.read()  # Warm the OS page cache so the first parse is not charged for disk reads
+        if not replayed:
+            build(path, variants['baseline'])  # Unmeasured: loads the embedding model and lazy imports
+        built = {}
+        for name, settings in variants.items():
+            vectorstore, tables, timings = build(path, settings)
+            built[name] = (vectorstore, tables)
+            document_timings[name].append(timings)
+            ask(vectorstore, tables, settings, group[0])  # Warm-up, not measured
+
+        runs = {name: [[] for _ in group] for name in variants}
+        for _ in range(args.repeat):
+            for i, record in enumerate(group):
+                for name, settings in variants.items():  # Alternate so drift affects both equally
+                    runs[name][i].append(ask(*built[name], settings, record))
+        for i, record in enumerate(group):
+            replayed.append((record, summarize(runs['baseline'][i]), summarize(runs['candidate'][i])))
+    server.stop()
+
+    retrieval = [(record, base, cand) for record, base, cand in replayed if not record['table_answer']]
+    reproduced = [recall(selected(record), selected(base)) for record, base, _ in retrieval]
+    recalls = [recall(selected(record), selected(cand)) for record, _, cand in retrieval]
+    base_tokens = sum(base['prompt_tokens'] for _, base, _ in replayed) / len(replayed)
+    cand_tokens = sum(cand['prompt_tokens'] for _, _, cand in replayed) / len(replayed)
+    errors = sum(bool(cand['error']) for _, _, cand in replayed)
+
+    print(f"\n{len(replayed)} questions over {len(groups)} document/setting group(s), {args.repeat} runs each")
+    print(f"candidate settings: {json.dumps(overrides) if overrides else '(same as recorded)'}")
+    if reproduced and p50(reproduced) < 0.99:
+        print(f"warning: replaying the recorded settings retrieves only {p50(reproduced):.0%} (p50) of the recorded text; "
+              "the document or embedding model may have changed since recording")
+    print(f"recall of recorded context:  {sum(recalls) / max(1, len(recalls)):.3f} mean, {min(recalls, default=1.0):.3f} min")
+    print(f"prompt tokens:               {base_tokens:.0f} -> {cand_tokens:.0f} "
+          f"({(cand_tokens - base_tokens) / max(1.0, base_tokens):+.1%})")
+    if errors:
+        print(f"errors:                      {errors}")
+
+    failures = []
+    print(f"\n{'stage':<11}{'baseline p50':>14}{'candidate p50':>15}{'change':>9}{'allowed':>9}")
+    for stage in DOCUMENT_STAGES + session_log.STAGES:
+        if stage in DOCUMENT_STAGES:
+            base = p50([t[stage] for t in document_timings['baseline']])
+            cand = p50([t[stage] for t in document_timings['candidate']])
+        else:
+            base = p50([b['timings'][stage] for _, b, _ in replayed if stage in b['timings']])
+            cand = p50([c['timings'][stage] for _, _, c in replayed if stage in c['timings']])
+        change = (cand - base) / base if base else 0.0
+        limit = thresholds.get(stage)
+        print(f"{stage:<11}{base:>11.1f} ms{cand:>12.1f} ms{change:>+9.1%}"
+              + (f"{limit:>+9.0%}" if limit is not None else f"{'-':>9}"))
+        if limit is not None and change > limit and cand - base > args.min_slowdown_ms:
+            failures.append(f"{stage} p50 slowed down {change:+.1%} (allowed {limit:+.0%})")
+    if recalls and sum(recalls) / len(recalls) < args.min_recall:
+        failures.append(f"mean recall {sum(recalls) / len(recalls):.3f} is below {args.min_recall:.3f}")
+    if errors:
+        failures.append(f"{errors} questions failed with the candidate settings")
+
+    print()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: no regression beyond the thresholds")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/retrieval_window.py
+#
+# Compares large overlapping chunks with small child chunks whose prompt context is widened by
+# offset (RETRIEVAL_MODE 'window' / 'page'): vector count, index and store size, embedding time,
+# and context size / answer latency against a fake Ollama that charges for prompt tokens.
+# "copied KiB" is what the store would hold if every chunk kept its own copy of its text.
+# Usage: python benchmarks/retrieval_window.py [--pdf file.pdf] [--pages 50] [--queries 20]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from chunk_store import ChunkStore
+from fake_ollama import FakeOllama
+
+# (label, chunk_size, chunk_overlap, retrieval mode)
+SETUPS = [
+    ("1000/200 chunk", 1000, 200, 'chunk'),
+    ("400/200 chunk", 400, 200, 'chunk'),
+    ("400/0 chunk", 400, 0, 'chunk'),
+    ("400/0 window", 400, 0, 'window'),
+    ("400/0 page", 400, 0, 'page'),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Index size and answer latency: overlapping chunks vs retrieval windows")
+    parser.add_argument("--pdf", help="Index this PDF instead of synthetic pages")
+    parser.add_argument("--pages", type=int, default=50, help="Synthetic pages when no PDF is given")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=500.0, help="Fake Ollama prompt processing speed")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeOllama(port=0, latency_ms=50, tokens_per_sec=0, prompt_tokens_per_sec=args.prompt_tokens_per_sec).start()
+    os.environ["OLLAMA_HOST"] = server.url  # Must be set before `ollama` is first imported
+
+    import chunker
+    import llm_handler
+    import vector_store
+    from chunk_store import expand_hits
+    from context_builder import build_context
+
+    if args.pdf:
+        import pdf_processor
+        page_texts = pdf_processor.load_page_texts(args.pdf)
+    else:
+        from chunking import synthetic_pages
+        page_texts = synthetic_pages(args.pages)
+    buffer, page_starts = chunker.build_buffer(page_texts)
+    sentences = [s.strip() for s in buffer.replace("\n", " ").split(". ") if len(s.split()) >= 6]
+    queries = random.Random(args.seed).sample(sentences, min(args.queries, len(sentences)))
+    vector_store.get_embeddings().embed_query("warm up")
+    print(f"document: {len(buffer):,} characters, {len(page_texts)} pages, {len(queries)} queries\n")
+
+    print(f"{'setup':<16}{'vectors':>9}{'index KiB':>11}{'store KiB':>11}{'copied KiB':>12}{'embed s':>9}"
+          f"{'retrieve ms':>13}{'ctx tokens':>12}{'answer ms':>11}")
+    for label, chunk_size, chunk_overlap, mode in SETUPS:
+        chunks = chunker.chunk_buffer(buffer, page_starts, args.pdf or "synthetic.pdf", chunk_size, chunk_overlap)
+        start = time.perf_counter()
+        vectorstore = vector_store.create_vector_store(chunks, compact=True, buffer=buffer, page_starts=page_starts)
+        embed_seconds = time.perf_counter() - start
+        index_bytes = vectorstore.index.ntotal * vectorstore.index.d * 4
+        store_bytes = vectorstore.docstore.store.nbytes()
+        copied_bytes = ChunkStore.from_documents(chunks).nbytes()
+
+        config.RETRIEVAL_MODE = mode
+        retrieve, tokens, answer = [], [], []
+        for query in queries:
+            start = time.perf_counter()
+            scored = vectorstore.similarity_search_with_score(query, k=config.RETRIEVAL_MAX_K)
+            scored = expand_hits(
+                vectorstore, scored, mode, config.RETRIEVAL_WINDOW_CHARS, config.PARENT_MAX_CHARS
+            )
+            build_context(scored, config.CONTEXT_WINDOW_TOKENS - config.RESPONSE_TOKEN_RESERVE)
+            retrieve.append(time.perf_counter() - start)
+
+            stats = {}
+            start = time.perf_counter()
+            llm_handler.get_text_chat_response(vectorstore, query, [], stats)
+            answer.append(time.perf_counter() - start)
+            tokens.append(stats.get('context_tokens', 0))
+
+        n = max(1, len(queries))
+        print(f"{label:<16}{len(chunks):>9}{index_bytes / 1024:>11.0f}{store_bytes / 1024:>11.0f}"
+              f"{copied_bytes / 1024:>12.0f}{embed_seconds:>9.2f}{sum(retrieve) / n * 1000:>13.1f}{sum(tokens) / n:>12.0f}{sum(answer) / n * 1000:>11.0f}")
+    server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/table_lookup.py
+#
+# Numeric questions about table cells, answered from text chunks only, with matching table rows in
+# the prompt, and with direct table answers: direct-answer rate and accuracy, whether the context holds
+# the asked-for cell, prompt size, and answer latency against a fake Ollama that charges for prompt
+# tokens. Uses a generated spec-sheet PDF.
+# Usage: python benchmarks/table_lookup.py [--tables 5] [--rows 20] [--queries 40]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fitz  # PyMuPDF
+import config
+from fake_ollama import FakeOllama
+
+COLUMNS = ["Model", "Max torque (Nm)", "Power (kW)", "Weight (kg)", "Price (USD)"]
+
+def spec_sheet(path: str, num_tables: int, rows: int, seed: int = 0) -> list:
+    """Writes a PDF with one ruled spec table per page between prose pages; returns the table rows."""
+    rng = random.Random(seed)
+    from chunking import synthetic_pages
+    prose = synthetic_pages(num_tables, seed)
+    doc, all_rows = fitz.open(), []
+    for t in range(num_tables):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 40, 550, 800), prose[t], fontsize=8)
+        page = doc.new_page()
+        page.insert_text((50, 40), f"Specifications, series {chr(65 + t)}", fontsize=11)
+        table_rows = [COLUMNS] + [
+            [f"{chr(65 + t)}{100 + 10 * r}", str(rng.randint(100, 900)), str(rng.randint(40, 400)),
+             str(rng.randint(800, 3000)), f"{rng.randint(10, 90)},{rng.randint(100, 999)}"]
+            for r in range(rows)
+        ]
+        for r, row in enumerate(table_rows):
+            for c, cell in enumerate(row):
+                rect = fitz.Rect(50 + 100 * c, 60 + 18 * r, 150 + 100 * c, 78 + 18 * r)
+                page.draw_rect(rect)
+                page.insert_text((rect.x0 + 3, rect.y0 + 13), cell, fontsize=8)
+        all_rows += table_rows[1:]
+    doc.save(path)
+    return all_rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Cell-level questions with and without the table index")
+    parser.add_argument("--tables", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=500.0, help="Fake Ollama prompt processing speed")
+    args = parser.parse_args()
+
+    server = FakeOllama(port=0, latency_ms=50, tokens_per_sec=40, prompt_tokens_per_sec=args.prompt_tokens_per_sec).start()
+    os.environ["OLLAMA_HOST"] = server.url  # Must be set before `ollama` is first imported
+
+    import ingest
+    import llm_handler
+    import vector_store
+    from context_builder import build_context
+    from tables import format_rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = os.path.join(tmp, "specs.pdf")
+        rows = spec_sheet(pdf, args.tables, args.rows)
+        parsed = ingest.ingest_pdf(pdf, config.DEFAULT_CHUNK_SIZE, config.DEFAULT_CHUNK_OVERLAP, isolate=False)
+    vectorstore = vector_store.create_vector_store(
+        parsed['chunks'], buffer=parsed['buffer'], page_starts=parsed['page_starts']
+    )
+    table_index = parsed['tables']
+    print(f"{len(table_index)} tables, {sum(len(t.rows) for t in table_index.tables)} rows, {len(parsed['chunks'])} chunks")
+
+    rng = random.Random(1)
+    questions = []
+    for _ in range(args.queries):
+        row, column = rng.choice(rows), rng.randint(1, len(COLUMNS) - 1)
+        questions.append((f"What is the {COLUMNS[column].split(' (')[0].lower()} of the {row[0]}?", row[0], row[column]))
+
+    for label, tables, direct_answers in (
+        ("text only", None, False), ("table rows in prompt", table_index, False), ("direct answers", table_index, True)
+    ):
+        config.TABLE_DIRECT_ANSWERS = direct_answers
+        direct = correct = in_context = 0
+        tokens, latencies = [], []
+        for question, key, value in questions:
+            stats = {}
+            start = time.perf_counter()
+            response = llm_handler.get_text_chat_response(vectorstore, question, [], stats, tables=tables)
+            latencies.append(time.perf_counter() - start)
+            tokens.append(stats.get('prompt_tokens', 0))
+            if stats.get('table_answer'):
+                direct += 1
+                correct += value in response
+                in_context += value in response
+                continue
+            context, _ = build_context(llm_handler.retrieve(vectorstore, question), stats.get('token_budget', 0))
+            if tables is not None:
+                context += format_rows(tables.relevant_rows(question, config.TABLE_MAX_ROWS))
+            in_context += any(key in line and value in line for line in context.splitlines())
+
+        n = max(1, len(questions))
+        print(f"\n{label}:")
+        print(f"  direct answers:    {direct}/{n} ({correct} correct)")
+        print(f"  cell in context:   {in_context}/{n}")
+        print(f"  prompt tokens:     {sum(tokens) / n:.0f} avg")
+        print(f"  answer latency:    {sum(latencies) / n * 1000:.0f} ms avg")
+    server.stop()
+
+if __name__ == "__main__":
+    main()
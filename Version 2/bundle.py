@@ -0,0 +1,198 @@
+# bundle.py
+#
+# Portable snapshot of a processed document (vectors, chunks, metadata, images) in one file.
+# A bundle is an uncompressed ZIP, so every member can be memory-mapped in place:
+#   manifest.json          format version, source, chunking settings, embedding model, image list
+#   vectors.npy            float32 embedding matrix, one row per chunk
+#   chunks/...             ChunkStore text buffer, typed arrays and source list
+#   images/p{page}_{n}.*   extracted images in their original format
+#   tables.json            extracted tables as structured rows (optional)
+#   image_vectors.npy      figure embeddings for image search (optional; hashes are in the manifest)
+#
+# Build bundles for config.DEFAULT_PDFS (or given PDFs) with: python bundle.py [file.pdf ...]
+
+import io
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import zipfile
+from typing import List, Optional
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from PIL import Image
+import config
+import chunk_store
+import image_index
+import ingest
+import tables
+import upload_store
+import vector_store
+
+BUNDLE_FORMAT = "pdf-chatbot-bundle"
+BUNDLE_VERSION = 1
+
+def bundle_path(doc_hash: str, chunk_size: int, chunk_overlap: int) -> str:
+    """Where the bundle for a document, chunking setting and embedding model lives in config.BUNDLE_DIR."""
+    model = re.sub(r"[^\w.-]+", "-", config.EMBEDDING_MODEL_NAME)
+    return os.path.join(
+        config.BUNDLE_DIR, f"{doc_hash}_{chunk_size}_{chunk_overlap}_{model}_{config.EMBEDDING_BACKEND}.bundle"
+    )
+
+def _write_array(zf: zipfile.ZipFile, name: str, array: np.ndarray):
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array))
+    zf.writestr(name, buffer.getvalue())
+
+def export_bundle(path: str, vectorstore, images: List[tuple], source: str, doc_hash: str,
+                  chunk_size: int, chunk_overlap: int, table_index: Optional[tables.TableIndex] = None,
+                  figure_index: Optional[image_index.ImageIndex] = None):
+    """Writes a processed document to a single bundle file (atomically, via a temporary file)."""
+    store = chunk_store.store_of(vectorstore)
+    vectors = vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal).astype(np.float32)
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': BUNDLE_VERSION,
+        'source': os.path.basename(source),
+        'doc_hash': doc_hash,
+        'chunk_size': chunk_size,
+        'chunk_overlap': chunk_overlap,
+        'embedding_model': config.EMBEDDING_MODEL_NAME,
+        'embedding_backend': config.EMBEDDING_BACKEND,
+        'num_chunks': len(store),
+        'images': [],
+    }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial_path = path + ".part"
+    with zipfile.ZipFile(partial_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        _write_array(zf, "vectors.npy", vectors)
+        zf.writestr("chunks/text.bin", bytes(store.text))
+        for name, array in store.arrays().items():
+            _write_array(zf, f"chunks/{name}.npy", array)
+        zf.writestr("chunks/sources.json", json.dumps(store.sources))
+        for page_num, img_index, image in images:
+            fmt = (image.format or "PNG").upper()
+            buffer = io.BytesIO()
+            image.save(buffer, format=fmt)
+            name = f"images/p{page_num}_{img_index}.{fmt.lower()}"
+            zf.writestr(name, buffer.getvalue())
+            manifest['images'].append({'page': page_num, 'index': img_index, 'name': name})
+        if table_index is not None:
+            zf.writestr("tables.json", json.dumps(table_index.to_json()))
+        if figure_index is not None:
+            manifest['image_index'], figure_vectors = figure_index.to_parts()
+            if figure_vectors is not None:
+                _write_array(zf, "image_vectors.npy", figure_vectors)
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+    os.replace(partial_path, path)
+
+def _member_offsets(zf: zipfile.ZipFile, raw) -> dict:
+    """Maps each stored member to the (offset, size) of its data within the bundle file."""
+    offsets = {}
+    for info in zf.infolist():
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"Bundle member {info.filename} is compressed; bundles must be stored")
+        name_len, extra_len = struct.unpack("<HH", raw[info.header_offset + 26:info.header_offset + 30])
+        offsets[info.filename] = (info.header_offset + 30 + name_len + extra_len, info.file_size)
+    return offsets
+
+def _array_view(raw, offset: int, size: int) -> np.ndarray:
+    """Zero-copy numpy view of a `.npy` member inside the mapped bundle."""
+    header = io.BytesIO(raw[offset:offset + min(size, 4096)])
+    major, _ = np.lib.format.read_magic(header)
+    read_header = np.lib.format.read_array_header_1_0 if major == 1 else np.lib.format.read_array_header_2_0
+    shape, fortran_order, dtype = read_header(header)
+    count = int(np.prod(shape)) if shape else 1
+    array = np.frombuffer(raw, dtype=dtype, count=count, offset=offset + header.tell())
+    return array.reshape(shape, order="F" if fortran_order else "C")
+
+def load_bundle(path: str) -> dict:
+    """Opens a bundle without parsing the PDF or re-embedding anything.
+
+    Chunk text and metadata stay memory-mapped; vectors are copied once into a flat FAISS index;
+    images are decoded lazily by PIL on first use. Returns a dict with the vectorstore, images,
+    tables, image_index (None if the bundle has none) and manifest.
+    """
+    with open(path, "rb") as f:
+        raw = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        offsets = _member_offsets(zf, raw)
+
+    if manifest.get('format') != BUNDLE_FORMAT or manifest.get('version') != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle format: {manifest.get('format')} v{manifest.get('version')}")
+    if manifest['embedding_model'] != config.EMBEDDING_MODEL_NAME:
+        raise ValueError(
+            f"Bundle was embedded with {manifest['embedding_model']}, but the app uses {config.EMBEDDING_MODEL_NAME}"
+        )
+    if manifest.get('embedding_backend', 'torch') != config.EMBEDDING_BACKEND:
+        raise ValueError(
+            f"Bundle was embedded with the {manifest.get('embedding_backend', 'torch')} backend, "
+            f"but the app uses {config.EMBEDDING_BACKEND}"
+        )
+
+    view = memoryview(raw)
+    arrays = {
+        name[len("chunks/"):-len(".npy")]: _array_view(raw, *offsets[name])
+        for name in offsets if name.startswith("chunks/") and name.endswith(".npy")
+    }
+    sources = json.loads(bytes(_member(view, offsets, "chunks/sources.json")))
+    store = chunk_store.ChunkStore.from_parts(_member(view, offsets, "chunks/text.bin"), arrays, sources)
+
+    vectors = _array_view(raw, *offsets["vectors.npy"])
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    vectorstore = FAISS(
+        embedding_function=vector_store.get_embeddings(),
+        index=index,
+        docstore=chunk_store.CompactDocstore(store),
+        index_to_docstore_id=chunk_store.ChunkIds(len(store)),
+    )
+
+    images = [
+        (entry['page'], entry['index'], Image.open(io.BytesIO(_member(view, offsets, entry['name']))))
+        for entry in manifest['images']
+    ]
+    table_index = tables.TableIndex.from_json(
+        json.loads(bytes(_member(view, offsets, "tables.json"))) if "tables.json" in offsets else []
+    )
+    figure_index = None
+    if 'image_index' in manifest:
+        figure_vectors = _array_view(raw, *offsets["image_vectors.npy"]) if "image_vectors.npy" in offsets else None
+        figure_index = image_index.ImageIndex.from_parts(manifest['image_index'], figure_vectors, images)
+    return {
+        'vectorstore': vectorstore, 'images': images, 'tables': table_index,
+        'image_index': figure_index, 'manifest': manifest,
+    }
+
+def _member(view: memoryview, offsets: dict, name: str) -> memoryview:
+    offset, size = offsets[name]
+    return view[offset:offset + size]
+
+def build_bundle(pdf_path: str, chunk_size: int = config.DEFAULT_CHUNK_SIZE,
+                 chunk_overlap: int = config.DEFAULT_CHUNK_OVERLAP) -> str:
+    """Processes a PDF exactly like the app does and writes its bundle. Returns the bundle path."""
+    doc_hash = upload_store.file_digest(pdf_path)
+    parsed = ingest.ingest_pdf(pdf_path, chunk_size, chunk_overlap)
+    for warning in parsed['warnings']:
+        print(f"{pdf_path}: {warning}")
+    vectorstore = vector_store.create_vector_store(
+        parsed['chunks'], buffer=parsed['buffer'], page_starts=parsed['page_starts']
+    )
+    figure_index = image_index.ImageIndex.build(parsed['images'], fingerprints=parsed['fingerprints'])
+    path = bundle_path(doc_hash, chunk_size, chunk_overlap)
+    export_bundle(
+        path, vectorstore, parsed['images'], pdf_path, doc_hash, chunk_size, chunk_overlap, parsed['tables'], figure_index
+    )
+    return path
+
+if __name__ == "__main__":
+    for pdf in sys.argv[1:] or config.DEFAULT_PDFS.values():
+        if not os.path.exists(pdf):
+            print(f"Skipping missing PDF: {pdf}")
+            continue
+        print(f"{pdf} -> {build_bundle(pdf)}")
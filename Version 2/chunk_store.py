@@ -0,0 +1,276 @@
+# chunk_store.py
+
+import json
+import mmap
+import os
+import sys
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+import chunker
+
+_ARRAYS = ('starts', 'ends', 'pages', 'start_indices', 'source_ids')
+_BUFFER_ARRAYS = ('page_offsets',)  # Only present when the store holds a whole-document buffer
+
+class ChunkStore:
+    """Chunk texts in one UTF-8 buffer addressed by byte offsets, with metadata in typed arrays.
+
+    Built with `from_buffer`, the buffer is the whole document and chunks are (possibly
+    overlapping) spans of it, so text around a hit can be read back by offset.
+    """
+
+    def __init__(self, text, starts, ends, pages, start_indices, source_ids, sources: List[str],
+                 page_offsets: Optional[np.ndarray] = None):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.pages = pages
+        self.start_indices = start_indices
+        self.source_ids = source_ids
+        self.sources = sources
+        self.page_offsets = page_offsets
+
+    @classmethod
+    def from_documents(cls, documents: list) -> "ChunkStore":
+        """Packs LangChain documents (as returned by the splitter) into a compact store."""
+        buffer = bytearray()
+        starts, ends, pages, start_indices, source_ids = [], [], [], [], []
+        source_lookup = {}
+        for doc in documents:
+            encoded = doc.page_content.encode("utf-8")
+            starts.append(len(buffer))
+            buffer += encoded
+            ends.append(len(buffer))
+            pages.append(doc.metadata.get('page', -1))
+            start_indices.append(doc.metadata.get('start_index', -1))
+            source = doc.metadata.get('source', "")
+            source_ids.append(source_lookup.setdefault(source, len(source_lookup)))
+        return cls(
+            bytes(buffer),
+            np.array(starts, dtype=np.int64),
+            np.array(ends, dtype=np.int64),
+            np.array(pages, dtype=np.int32),
+            np.array(start_indices, dtype=np.int32),
+            np.array(source_ids, dtype=np.int32),
+            list(source_lookup),
+        )
+
+    @classmethod
+    def from_buffer(cls, documents: list, buffer: str, page_starts: np.ndarray) -> "ChunkStore":
+        """Stores the document buffer once and each chunk as a span of it (from `chunker.chunk_buffer`).
+
+        Overlapping chunks cost no extra text, and `context` can widen any hit to its neighbourhood.
+        """
+        encoded = buffer.encode("utf-8")
+        starts = _byte_offsets(buffer, encoded, [doc.metadata['start_index'] for doc in documents])
+        ends = _byte_offsets(buffer, encoded, [doc.metadata['end_index'] for doc in documents])
+        return cls(
+            encoded,
+            starts,
+            ends,
+            np.array([doc.metadata.get('page', -1) for doc in documents], dtype=np.int32),
+            np.array([doc.metadata['start_index'] for doc in documents], dtype=np.int32),
+            np.zeros(len(documents), dtype=np.int32),
+            [documents[0].metadata.get('source', "") if documents else ""],
+            _byte_offsets(buffer, encoded, page_starts),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def chunk_text(self, i: int) -> str:
+        return bytes(self.text[self.starts[i]:self.ends[i]]).decode("utf-8")
+
+    def document(self, i: int) -> Document:
+        """Materialises chunk `i` as a Document only when it is actually returned by a search."""
+        metadata = {'source': self.sources[self.source_ids[i]], 'page': int(self.pages[i]), 'chunk_id': i}
+        if self.start_indices[i] >= 0:
+            metadata['start_index'] = int(self.start_indices[i])
+        return Document(page_content=self.chunk_text(i), metadata=metadata)
+
+    def context(self, i: int, mode: str, window_chars: int, max_chars: int) -> Tuple[str, int]:
+        """Text to put in the prompt for chunk `i` and its character offset in the document.
+
+        'window' widens the chunk by about `window_chars` on each side, trimmed to whole sentences;
+        'page' returns the page(s) the chunk lies on, or a window if they exceed `max_chars`.
+        Stores without a document buffer (and mode 'chunk') return the chunk itself.
+        """
+        start_index = int(self.start_indices[i])
+        if mode == 'chunk' or self.page_offsets is None:
+            return self.chunk_text(i), start_index
+        start, end = int(self.starts[i]), int(self.ends[i])
+        chunk_chars = len(self.chunk_text(i))
+
+        if mode == 'page':
+            first = int(np.searchsorted(self.page_offsets, start, side="right")) - 1
+            last = int(np.searchsorted(self.page_offsets, max(end - 1, start), side="right"))
+            lo = int(self.page_offsets[max(first, 0)])
+            hi = int(self.page_offsets[last]) if last < len(self.page_offsets) else len(self.text)
+            # Offsets are bytes and the cap is characters; only decode when the byte length is inconclusive
+            if hi - lo <= max_chars or (hi - lo <= 4 * max_chars and len(self._decode(lo, hi)) <= max_chars):
+                prefix = len(self._decode(lo, start))
+                text = self._decode(lo, hi)
+                stripped = text.lstrip()
+                return stripped.rstrip(), start_index - prefix + len(text) - len(stripped)
+            window_chars = max(window_chars, (max_chars - chunk_chars) // 2)
+
+        # Read enough bytes for `window_chars` characters in any encoding width, then cut by character
+        lo = self._char_boundary(max(0, start - 4 * window_chars))
+        hi = self._char_boundary(min(len(self.text), end + 4 * window_chars))
+        text = self._decode(lo, hi)
+        prefix = len(self._decode(lo, start))
+        first, last = max(0, prefix - window_chars), min(len(text), prefix + chunk_chars + window_chars)
+        at_start, at_end = lo == 0 and first == 0, hi == len(self.text) and last == len(text)
+        text, prefix = text[first:last], prefix - first
+        chunk_end = prefix + chunk_chars
+        head, tail = 0, len(text)
+        if not at_start:
+            cut = chunker.first_sentence_end(text, 0, prefix)
+            if cut < 0:
+                cut = text.find(" ", 0, prefix)  # No sentence boundary: at least avoid a cut-off word
+            if cut >= 0:
+                head = cut + len(text[cut:prefix]) - len(text[cut:prefix].lstrip())
+        if not at_end:
+            cut = chunker.last_sentence_end(text, chunk_end, len(text))
+            if cut < 0:
+                cut = text.rfind(" ", chunk_end, len(text))
+            if cut >= 0:
+                tail = cut
+        return text[head:tail].rstrip(), start_index - prefix + head
+
+    def _decode(self, lo: int, hi: int) -> str:
+        return bytes(self.text[lo:hi]).decode("utf-8", "ignore")
+
+    def _char_boundary(self, i: int) -> int:
+        """Moves byte offset `i` back to the start of the UTF-8 character it falls in."""
+        while 0 < i < len(self.text) and self.text[i] & 0xC0 == 0x80:
+            i -= 1
+        return i
+
+    def nbytes(self) -> int:
+        """Total memory held by the store's buffers."""
+        return len(self.text) + sum(array.nbytes for array in self.arrays().values()) + sum(
+            sys.getsizeof(source) for source in self.sources
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The typed metadata arrays by name, as written by `save`."""
+        arrays = {name: getattr(self, name) for name in _ARRAYS}
+        arrays.update({name: getattr(self, name) for name in _BUFFER_ARRAYS if getattr(self, name) is not None})
+        return arrays
+
+    @classmethod
+    def from_parts(cls, text, arrays: Dict[str, np.ndarray], sources: List[str]) -> "ChunkStore":
+        """Rebuilds a store from a text buffer and arrays (e.g. views into a memory-mapped file)."""
+        return cls(text, *(arrays[name] for name in _ARRAYS), sources, *(arrays.get(name) for name in _BUFFER_ARRAYS))
+
+    def save(self, directory: str):
+        """Writes the store as flat files that `load` can memory-map without copying."""
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "text.bin"), "wb") as f:
+            f.write(self.text)
+        for name, array in self.arrays().items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        with open(os.path.join(directory, "sources.json"), "w", encoding="utf-8") as f:
+            json.dump(self.sources, f)
+
+    @classmethod
+    def load(cls, directory: str) -> "ChunkStore":
+        """Opens a saved store with the text buffer and arrays memory-mapped read-only."""
+        text = b""
+        if os.path.getsize(os.path.join(directory, "text.bin")) > 0:
+            with open(os.path.join(directory, "text.bin"), "rb") as f:
+                text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in _ARRAYS + _BUFFER_ARRAYS
+            if os.path.exists(os.path.join(directory, f"{name}.npy"))
+        }
+        with open(os.path.join(directory, "sources.json"), encoding="utf-8") as f:
+            sources = json.load(f)
+        return cls.from_parts(text, arrays, sources)
+
+class CompactDocstore(Docstore):
+    """Docstore adapter so FAISS `similarity_search` reads chunks from a ChunkStore."""
+
+    def __init__(self, store: ChunkStore):
+        self.store = store
+
+    def search(self, search: str) -> Union[str, Document]:
+        i = int(search)
+        if 0 <= i < len(self.store):
+            return self.store.document(i)
+        return f"ID {search} not found."
+
+class ChunkIds(Mapping):
+    """Stand-in for FAISS's `index_to_docstore_id` dict: vector row `i` maps to chunk id `str(i)`."""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, i: int) -> str:
+        if not 0 <= i < self.size:
+            raise KeyError(i)
+        return str(i)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        return iter(range(self.size))
+
+def _byte_offsets(buffer: str, encoded: bytes, char_offsets) -> np.ndarray:
+    """Converts character offsets into `buffer` to byte offsets into its UTF-8 encoding."""
+    char_offsets = np.asarray(char_offsets, dtype=np.int64)
+    if len(encoded) == len(buffer):
+        return char_offsets
+    codepoints = np.frombuffer(buffer.encode("utf-32-le"), dtype=np.uint32)
+    widths = 1 + (codepoints >= 0x80).astype(np.int64) + (codepoints >= 0x800) + (codepoints >= 0x10000)
+    return np.concatenate(([0], np.cumsum(widths)))[char_offsets]
+
+def documents_nbytes(documents: list) -> int:
+    """Approximate memory held by LangChain documents in FAISS's default in-memory docstore."""
+    total = 0
+    for doc in documents:
+        total += sys.getsizeof(doc) + sys.getsizeof(doc.page_content) + sys.getsizeof(doc.metadata)
+        total += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in doc.metadata.items())
+        total += sys.getsizeof(doc.__dict__) if hasattr(doc, "__dict__") else 0
+        total += 2 * sys.getsizeof("00000000-0000-0000-0000-000000000000")  # uuid key in docstore + id map
+    return total
+
+def store_of(vectorstore) -> ChunkStore:
+    """Returns the ChunkStore behind a FAISS store, packing its docstore if it is not compact yet."""
+    if isinstance(vectorstore.docstore, CompactDocstore):
+        return vectorstore.docstore.store
+    ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+    return ChunkStore.from_documents([vectorstore.docstore.search(doc_id) for doc_id in ids])
+
+def attach(vectorstore, documents: list, buffer: Optional[str] = None,
+           page_starts: Optional[np.ndarray] = None) -> ChunkStore:
+    """Replaces a FAISS store's per-object docstore with a compact store built from `documents`.
+
+    Given the document `buffer` the chunks were cut from, chunks are stored as spans of it.
+    """
+    if buffer is not None:
+        store = ChunkStore.from_buffer(documents, buffer, page_starts)
+    else:
+        store = ChunkStore.from_documents(documents)
+    vectorstore.docstore = CompactDocstore(store)
+    vectorstore.index_to_docstore_id = ChunkIds(len(store))
+    return store
+
+def expand_hits(vectorstore, scored_docs: List[tuple], mode: str, window_chars: int, max_chars: int) -> List[tuple]:
+    """Swaps each retrieved (child chunk, score) for its surrounding window or page, read by offset."""
+    if mode == 'chunk' or not isinstance(vectorstore.docstore, CompactDocstore):
+        return scored_docs
+    store = vectorstore.docstore.store
+    expanded = []
+    for doc, score in scored_docs:
+        if 'chunk_id' not in doc.metadata:
+            expanded.append((doc, score))
+            continue
+        text, start_index = store.context(doc.metadata['chunk_id'], mode, window_chars, max_chars)
+        expanded.append((Document(page_content=text, metadata={**doc.metadata, 'start_index': start_index}), score))
+    return expanded
@@ -0,0 +1,106 @@
+# chunker.py
+
+from typing import List, Tuple
+import numpy as np
+from langchain_core.documents import Document
+import config
+
+_TERMINATORS = ".!?"
+
+def build_buffer(page_texts: List[str]) -> Tuple[str, np.ndarray]:
+    """Joins page texts into one document buffer and returns it with each page's start offset."""
+    lengths = np.fromiter((len(text) + 1 for text in page_texts), dtype=np.int64, count=len(page_texts))
+    page_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(page_texts) else lengths
+    return "\n".join(page_texts), page_starts
+
+def _is_sentence_end(buffer: str, i: int) -> bool:
+    return i + 1 >= len(buffer) or buffer[i + 1].isspace()
+
+def last_sentence_end(buffer: str, lo: int, hi: int) -> int:
+    """Offset just past the last sentence end (or paragraph break) in buffer[lo:hi], or -1."""
+    best = buffer.rfind("\n\n", lo, hi)
+    for mark in _TERMINATORS:
+        i = buffer.rfind(mark, lo, hi)
+        while i > best and not _is_sentence_end(buffer, i):
+            i = buffer.rfind(mark, lo, i)
+        if i >= 0 and i + 1 > best:
+            best = i + 1
+    return best
+
+def first_sentence_end(buffer: str, lo: int, hi: int) -> int:
+    """Offset just past the first sentence end (or paragraph break) in buffer[lo:hi], or -1."""
+    best = buffer.find("\n\n", lo, hi)
+    best = hi if best < 0 else best
+    for mark in _TERMINATORS:
+        i = buffer.find(mark, lo, best)
+        while 0 <= i and not _is_sentence_end(buffer, i):
+            i = buffer.find(mark, i + 1, best)
+        if 0 <= i < best:
+            best = i + 1
+    return best if best < hi else -1
+
+def chunk_spans(buffer: str, chunk_size: int, chunk_overlap: int) -> np.ndarray:
+    """Computes (start, end) offsets of chunks over the whole buffer.
+
+    Chunks end on sentence boundaries where possible, are capped at the embedding model's
+    token limit, and overlap by offset so no text is copied until Documents are built.
+    Boundaries are only searched near each cut point instead of scanning the whole buffer.
+    """
+    n = len(buffer.rstrip())  # Trailing whitespace (common in PDF text) never starts a chunk of its own
+    limit = min(chunk_size, config.EMBEDDING_MAX_TOKENS * config.CHARS_PER_TOKEN)
+    overlap = min(chunk_overlap, limit // 2)
+    spans = []
+    start = _skip_space(buffer, 0)
+    while start < n:
+        target = start + limit
+        if target >= n:
+            end = n
+        else:
+            end = last_sentence_end(buffer, start + limit // 2, target)
+            if end < 0:
+                space = buffer.rfind(" ", start + limit // 2, target)
+                end = space if space > 0 else target
+        while end > start + 1 and buffer[end - 1].isspace():
+            end -= 1
+        spans.append((start, end))
+        if end >= n:
+            break
+
+        next_start = end - overlap
+        if overlap:
+            boundary = first_sentence_end(buffer, next_start, end)
+            if boundary >= 0:
+                next_start = boundary
+        start = _skip_space(buffer, max(next_start, start + 1))
+    return np.array(spans, dtype=np.int64).reshape(-1, 2)
+
+def _skip_space(buffer: str, i: int) -> int:
+    n = len(buffer)
+    while i < n and buffer[i].isspace():
+        i += 1
+    return i
+
+def chunk_documents(page_texts: List[str], source: str, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """Chunks a whole document across page boundaries, attributing each chunk to its pages."""
+    buffer, page_starts = build_buffer(page_texts)
+    return chunk_buffer(buffer, page_starts, source, chunk_size, chunk_overlap)
+
+def chunk_buffer(buffer: str, page_starts: np.ndarray, source: str, chunk_size: int,
+                 chunk_overlap: int) -> List[Document]:
+    """Chunks a document buffer from `build_buffer`; each Document records its span in the buffer."""
+    spans = chunk_spans(buffer, chunk_size, chunk_overlap)
+    first_pages = np.searchsorted(page_starts, spans[:, 0], side="right") - 1
+    last_pages = np.searchsorted(page_starts, np.maximum(spans[:, 1] - 1, 0), side="right") - 1
+    return [
+        Document(
+            page_content=buffer[start:end],
+            metadata={
+                'source': source,
+                'page': int(first),
+                'end_page': int(last),
+                'start_index': int(start),
+                'end_index': int(end),
+            },
+        )
+        for (start, end), first, last in zip(spans.tolist(), first_pages.tolist(), last_pages.tolist())
+    ]
@@ -1,12 +1,124 @@
 # config.py
 
+import os
+
 # 🧠 Model Configurations
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
-OLLAMA_MODEL = "llava"  # Ensure you run `ollama pull llava`
+EMBEDDING_MAX_TOKENS = 256       # Longer inputs are truncated by the embedding model, so chunks are capped
+EMBEDDING_BACKEND = "torch"      # 'torch' (sentence-transformers), 'onnx' (ONNX Runtime) or 'onnx-int8' (quantized)
+EMBEDDING_ONNX_DIR = "./.cache/onnx"  # Exported models (`python onnx_embeddings.py`, or exported on first use)
+EMBEDDING_THREADS = 0            # ONNX Runtime intra-op threads (0 = one per physical core)
+EMBEDDING_BATCH_SIZE = 32        # Chunks per forward pass when embedding documents
+TEXT_MODEL = "llama3.2"  # Fast text-only model for RAG answers (`ollama pull llama3.2`)
+VISION_MODEL = "llava"  # Ensure you run `ollama pull llava`
+MODEL_FALLBACKS = {'text': VISION_MODEL}  # Task -> model used when the primary is saturated or fails
+MODEL_MAX_IN_FLIGHT = 2          # Concurrent requests per model before routing to the fallback
+MODEL_KEEP_ALIVE = "30m"         # How long Ollama keeps each model loaded after a request
+WARM_UP_MODELS = True            # Load both models at startup (after the import warm-up)
+SHOW_MODEL_STATS = False         # Show per-model latency and load in the sidebar
+
+# 🚀 Startup
+WARM_UP_IMPORTS = True           # Import heavy modules in a background thread at startup
+SHOW_IMPORT_PROFILE = False      # Show per-module import times in the sidebar
 
 # 📄 Text Chunking Settings
-DEFAULT_CHUNK_SIZE = 1000
-DEFAULT_CHUNK_OVERLAP = 200
+DEFAULT_CHUNK_SIZE = 400         # Small chunks for precise search; the prompt gets a wider window (RETRIEVAL_MODE)
+DEFAULT_CHUNK_OVERLAP = 0        # Windows already cover neighbouring text, so overlap only adds vectors
+
+# 🗄️ Chunk Storage
+COMPACT_CHUNK_STORE = True       # Keep chunk texts/metadata in flat buffers instead of Document objects
+
+# ⚡ Query Embedding
+QUERY_BATCH_MAX_WAIT_MS = 5      # Cap on how long a query waits for others to share its batch
+QUERY_BATCH_MAX_SIZE = 32
+QUERY_CACHE_SIZE = 1024          # Recent query vectors kept in an LRU cache
+
+# 🔎 Retrieval & Context Assembly
+CONTEXT_WINDOW_TOKENS = 4096     # num_ctx requested from Ollama
+RESPONSE_TOKEN_RESERVE = 512     # Tokens left free for the model's answer
+MIN_CONTEXT_TOKENS = 256         # Context budget floor when history is long
+CHARS_PER_TOKEN = 4              # Heuristic used to estimate token counts
+RETRIEVAL_MIN_K = 2
+RETRIEVAL_MAX_K = 8              # Candidates fetched before the score-gap cut
+RETRIEVAL_SCORE_GAP = 0.35       # Cut where a distance jump exceeds this share of the spread
+RETRIEVAL_MODE = "window"        # 'chunk': prompt gets the hits as-is; 'window'/'page': text around each hit
+RETRIEVAL_WINDOW_CHARS = 300     # Characters added on each side of a hit in 'window' mode (sentence-aligned)
+PARENT_MAX_CHARS = 4000          # In 'page' mode, longer pages fall back to a window of this size
+MERGE_SLACK_CHARS = 50           # Chunks of one document closer than this are merged
+REDUNDANCY_THRESHOLD = 0.8       # Word-overlap ratio above which a sentence is dropped
+
+# 📊 Tables
+TABLES_ENABLED = True            # Extract tables as structured rows with PyMuPDF's layout analysis
+TABLE_DIRECT_ANSWERS = True      # Answer single-cell and highest/lowest questions from tables without the LLM
+TABLE_MAX_ROWS = 8               # Matching table rows put in the prompt
+TABLE_TEXT_CONTEXT_TOKENS = 512  # Text context kept alongside matching table rows
+
+# 🔮 Speculative Retrieval
+PREFETCH_ENABLED = True          # Retrieve for likely next questions in the background
+PREFETCH_WHILE_TYPING = True     # Also prefetch on debounced partial input (uses streamlit-keyup)
+PREFETCH_DEBOUNCE_MS = 400       # Pause in typing before a partial question is prefetched
+PREFETCH_MIN_CHARS = 12          # Shorter partial questions are not worth a retrieval
+PREFETCH_FOLLOW_UPS = 3          # Suggested follow-up questions prefetched after each answer
+PREFETCH_MAX_WASTED = 30         # Per session: prefetching stops after this many unused retrievals
+PREFETCH_CACHE_ENTRIES = 32      # Prefetched results kept per session
+PREFETCH_WORKERS = 2             # Background retrieval threads shared by all sessions
+
+# 🔍 OCR Fallback for Scanned Pages
+OCR_ENABLED = True               # Requires the `tesseract` binary on PATH
+OCR_MIN_CHARS = 20               # Pages with less extracted text are treated as scanned
+OCR_DPI = 300
+OCR_LANGUAGE = "eng"
+OCR_WORKERS = os.cpu_count() or 2
+OCR_CACHE_DIR = "./.cache/ocr"
+
+# 🖼️ Page Rendering for Visual Questions
+VISION_TARGET_PIXELS = 1344      # Longer page side in pixels (a multiple of LLaVA's 336px tiles)
+RENDER_MIN_DPI = 72
+RENDER_MAX_DPI = 300
+RENDER_REGION_MAX_DPI = 1200     # Cropped regions are rendered on their own, so they can use a higher DPI
+RENDER_WORKERS = 2
+RENDER_CACHE_DIR = "./.cache/pages"
+RENDER_CACHE_MEMORY_MB = 128
+RENDER_CACHE_DISK_MB = 1024
+
+# 🗂️ Figure Search
+IMAGE_EMBEDDING_MODEL = "clip-ViT-B-32"  # CLIP model (sentence-transformers) embedding figures and text descriptions
+IMAGE_EMBEDDINGS_ENABLED = True  # Without embeddings, figures can still be matched by perceptual hash
+IMAGE_EMBEDDING_BATCH_SIZE = 16
+IMAGE_THUMBNAIL_SIDE = 336      # Figures are hashed and embedded from copies this small (CLIP looks at 224 px)
+IMAGE_DUPLICATE_DISTANCE = 6     # Figures whose 64-bit perceptual hashes differ in at most this many bits are copies
+IMAGE_SEARCH_RESULTS = 8
+
+# 📤 Uploads
+UPLOAD_DIR = "./.cache/uploads"  # Content-addressed: identical uploads are stored once
+UPLOAD_QUOTA_MB = 2048           # Least recently used uploads are deleted beyond this
+UPLOAD_BLOCK_SIZE = 1 << 20      # Bytes hashed/written per read while streaming an upload
+UPLOAD_PARTIAL_TTL_SECONDS = 3600  # Abandoned partial uploads older than this are removed
+UPLOAD_IN_USE_SECONDS = 3600     # Uploads open in a session this recently are never garbage-collected
+PROCESSED_CACHE_ENTRIES = 16     # Processed documents shared across sessions (keyed by content hash)
+
+# 🛡️ Ingestion Guardrails
+MAX_PAGES = 2000                 # Pages beyond this are ignored (the user is told the result is partial)
+MAX_CHUNKS = 20000               # Text chunks beyond this are not indexed
+MAX_SINGLE_IMAGE_PIXELS = 50_000_000   # Larger embedded images are skipped without being decoded
+MAX_TOTAL_IMAGE_PIXELS = 400_000_000   # Image extraction stops once this many pixels are loaded
+MAX_INGEST_SECONDS = 300         # Isolated parses running longer than this are killed
+WORKER_MEMORY_MB = 4096          # Address-space cap for the isolated parse worker (Unix only)
+INLINE_MAX_PAGES = 200           # Documents within all three INLINE_* limits are parsed in-process;
+INLINE_MAX_IMAGE_PIXELS = 50_000_000  # larger ones go to a memory-capped subprocess
+INLINE_MAX_FILE_MB = 25
+
+# 📦 Prebuilt Bundles (build with `python bundle.py`)
+BUNDLE_DIR = "./bundles"         # Bundles found here are opened instead of re-processing the PDF
+SAVE_BUNDLES = False             # Also write a bundle after each processing run
+
+# 📼 Session Recording & Replay (replay with `python benchmarks/replay.py`)
+SESSION_LOG_ENABLED = False      # Append every answered question (query, retrieved spans, prompt, timings) to SESSION_LOG_PATH
+SESSION_LOG_PATH = "./.cache/sessions/sessions.jsonl"
+SESSION_LOG_PROMPTS = True       # Also record full prompts (they contain document text)
+REPLAY_MAX_SLOWDOWN = {'retrieval': 0.25, 'context': 0.5, 'llm': 0.15, 'total': 0.15}  # Allowed p50 increase per stage
+REPLAY_MIN_SLOWDOWN_MS = 5.0     # Smaller absolute increases are treated as timing noise
+REPLAY_MIN_RECALL = 0.0          # Replay also fails when mean recall against the recording drops below this
 
 # 📁 Default PDF Documents
 # Create a 'default_pdfs' folder and place your documents inside.
@@ -0,0 +1,104 @@
+# context_builder.py
+
+import re
+from typing import List, Tuple
+import config
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for budgeting."""
+    return (len(text) + config.CHARS_PER_TOKEN - 1) // config.CHARS_PER_TOKEN
+
+def select_by_score_gap(scored_docs: List[tuple], min_k: int, max_k: int, gap_ratio: float) -> List[tuple]:
+    """Picks k dynamically, cutting the ranked list at the first large jump in distance."""
+    ranked = sorted(scored_docs, key=lambda pair: pair[1])[:max_k]
+    if len(ranked) <= min_k:
+        return ranked
+    spread = ranked[-1][1] - ranked[0][1]
+    if spread <= 0:
+        return ranked
+    for i in range(min_k, len(ranked)):
+        if (ranked[i][1] - ranked[i - 1][1]) / spread > gap_ratio:
+            return ranked[:i]
+    return ranked
+
+def merge_adjacent(docs: list) -> List[Tuple[str, dict]]:
+    """Merges overlapping or touching chunks of the same document into single passages, keeping rank order."""
+    groups = {}
+    order = []
+    for rank, doc in enumerate(docs):
+        meta = doc.metadata
+        start = meta.get('start_index')
+        key = meta.get('source') if start is not None else ('__unmerged__', rank)
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append((start or 0, doc.page_content, rank, meta))
+
+    merged = []
+    for key in order:
+        spans = sorted(groups[key], key=lambda item: item[0])
+        start, text, rank, meta = spans[0]
+        for next_start, next_text, next_rank, next_meta in spans[1:]:
+            end = start + len(text)
+            if next_start <= end + config.MERGE_SLACK_CHARS:
+                text += next_text[max(0, end - next_start):] if next_start < end else " " + next_text
+                rank = min(rank, next_rank)
+            else:
+                merged.append((rank, text, meta))
+                start, text, rank, meta = next_start, next_text, next_rank, next_meta
+        merged.append((rank, text, meta))
+
+    merged.sort(key=lambda item: item[0])
+    return [(text, meta) for _, text, meta in merged]
+
+def compress_passages(passages: List[str], threshold: float) -> List[str]:
+    """Drops sentences that repeat (near-)verbatim something already kept."""
+    kept_sets = []
+    compressed = []
+    for passage in passages:
+        sentences = []
+        for sentence in _SENTENCE_SPLIT.split(passage):
+            words = set(_WORD.findall(sentence.lower()))
+            if not words:
+                continue
+            if any(len(words & seen) / len(words | seen) >= threshold for seen in kept_sets):
+                continue
+            kept_sets.append(words)
+            sentences.append(sentence.strip())
+        if sentences:
+            compressed.append(" ".join(sentences))
+    return compressed
+
+def build_context(scored_docs: List[tuple], token_budget: int) -> Tuple[str, dict]:
+    """Assembles retrieved (document, distance) pairs into a context string that fits the token budget."""
+    selected = select_by_score_gap(
+        scored_docs, config.RETRIEVAL_MIN_K, config.RETRIEVAL_MAX_K, config.RETRIEVAL_SCORE_GAP
+    )
+    passages = merge_adjacent([doc for doc, _ in selected])
+    compressed = compress_passages([text for text, _ in passages], config.REDUNDANCY_THRESHOLD)
+
+    parts, used = [], 0
+    for text in compressed:
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            remaining = (token_budget - used) * config.CHARS_PER_TOKEN
+            text = text[:max(0, remaining)].rsplit(" ", 1)[0]
+            if text:
+                parts.append(text)
+                used += estimate_tokens(text)
+            break
+        parts.append(text)
+        used += cost
+
+    stats = {
+        'candidates': len(scored_docs),
+        'k': len(selected),
+        'passages': len(parts),
+        'token_budget': token_budget,
+        'context_tokens': used,
+        'raw_tokens': sum(estimate_tokens(doc.page_content) for doc, _ in selected),
+    }
+    return "\n\n".join(parts), stats
@@ -0,0 +1,103 @@
+# embedding_service.py
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import List
+from langchain_core.embeddings import Embeddings
+
+class BatchingQueryEmbedder(Embeddings):
+    """Wraps an embedding model so concurrent `embed_query` calls share one forward pass.
+
+    Queries arriving within `max_wait_ms` of the first queued one are embedded as a single batch,
+    and recent query vectors are kept in an LRU cache. Document embedding is passed through.
+    """
+
+    def __init__(self, model: Embeddings, max_wait_ms: float, max_batch: int, cache_size: int):
+        self.model = model
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._queue = []
+        self._cond = threading.Condition()
+        self._worker = None
+        self._started = time.perf_counter()
+        self._queries = 0
+        self._cache_hits = 0
+        self._batches = 0
+        self._batched_items = 0
+        self._delays = deque(maxlen=10000)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._cond:
+            self._queries += 1
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                self._cache_hits += 1
+                return self._cache[text]
+            future = Future()
+            self._queue.append((text, future, time.perf_counter()))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return future.result()
+
+    def _next_batch(self) -> list:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0][2] + self.max_wait
+            while len(self._queue) < self.max_batch and time.perf_counter() < deadline:
+                self._cond.wait(timeout=deadline - time.perf_counter())
+            batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            dispatched = time.perf_counter()
+            texts = list(dict.fromkeys(text for text, _, _ in batch))
+            try:
+                vectors = dict(zip(texts, self.model.embed_documents(texts)))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._cond:
+                self._batches += 1
+                self._batched_items += len(batch)
+                for text, vector in vectors.items():
+                    self._cache[text] = vector
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                self._delays.extend(dispatched - queued for _, _, queued in batch)
+            for text, future, _ in batch:
+                future.set_result(vectors[text])
+
+    def stats(self) -> dict:
+        """Throughput, cache hit rate, batch sizes and queueing delay since start-up."""
+        with self._cond:
+            delays = sorted(self._delays)
+            elapsed = time.perf_counter() - self._started
+
+            def percentile(p: float) -> float:
+                return delays[min(len(delays) - 1, int(p * len(delays)))] * 1000 if delays else 0.0
+
+            return {
+                'queries': self._queries,
+                'cache_hits': self._cache_hits,
+                'batches': self._batches,
+                'avg_batch_size': self._batched_items / self._batches if self._batches else 0.0,
+                'queries_per_sec': self._queries / elapsed if elapsed > 0 else 0.0,
+                'queue_delay_p50_ms': percentile(0.50),
+                'queue_delay_p95_ms': percentile(0.95),
+                'queue_delay_max_ms': delays[-1] * 1000 if delays else 0.0,
+            }
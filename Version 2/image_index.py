@@ -0,0 +1,184 @@
+# image_index.py
+
+import io
+import threading
+from typing import List, Optional, Tuple
+import faiss
+import numpy as np
+from PIL import Image
+import config
+
+_HASH_SIZE = 8
+_DCT_SIZE = 32
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+_DCT = _dct_matrix(_DCT_SIZE)
+
+def phash(image: Image.Image) -> int:
+    """64-bit perceptual hash: signs of the low-frequency DCT coefficients of a 32x32 grayscale thumbnail
+    relative to their median. Re-encoded, rescaled or lightly edited copies land a few bits apart."""
+    pixels = np.asarray(image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS), dtype=np.float32)
+    low = (_DCT @ pixels @ _DCT.T)[:_HASH_SIZE, :_HASH_SIZE].flatten()
+    bits = low > np.median(low[1:])  # The DC term only reflects overall brightness
+    return int(np.packbits(bits).view(">u8")[0])
+
+def fingerprint(image: Image.Image) -> Tuple[int, Image.Image]:
+    """Perceptual hash of `image` and the RGB copy (at most config.IMAGE_THUMBNAIL_SIDE on a side) it was
+    computed from, which is what gets embedded."""
+    small = image.convert("RGB")
+    small.thumbnail((config.IMAGE_THUMBNAIL_SIDE, config.IMAGE_THUMBNAIL_SIDE))
+    return phash(small), small
+
+def fingerprint_images(images: List[tuple]) -> List[Optional[tuple]]:
+    """`fingerprint` of each (page, index, image) entry, or None where it cannot be decoded.
+
+    Images given as encoded bytes are decoded one at a time and dropped once hashed, so memory use is
+    bounded by the largest image; ingest runs this within its resource limits.
+    """
+    fingerprints = []
+    for page_num, img_index, image in images:
+        try:
+            if isinstance(image, bytes):
+                with Image.open(io.BytesIO(image)) as decoded:
+                    fingerprints.append(fingerprint(decoded))
+            else:
+                fingerprints.append(fingerprint(image))
+        except Exception as e:
+            print(f"Error hashing image {img_index} on page {page_num}: {e}")
+            fingerprints.append(None)
+    return fingerprints
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Process-wide CLIP model (config.IMAGE_EMBEDDING_MODEL) embedding images and text into one space."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(config.IMAGE_EMBEDDING_MODEL, device="cpu")
+        return _model
+
+def _embed(items: list) -> np.ndarray:
+    vectors = get_model().encode(items, batch_size=config.IMAGE_EMBEDDING_BATCH_SIZE, normalize_embeddings=True)
+    return np.asarray(vectors, dtype=np.float32).reshape(len(items), -1)
+
+class ImageIndex:
+    """Extracted figures collapsed by perceptual hash, with CLIP vectors in their own FAISS index.
+
+    `entries` holds one representative per group of near-duplicates as (page, index, image, hash), and
+    `duplicates[i]` lists the (page, index) of the other copies of entry `i`.
+    """
+
+    def __init__(self, entries: List[tuple], duplicates: List[list], vectors: Optional[np.ndarray]):
+        self.entries = entries
+        self.duplicates = duplicates
+        self.vectors = vectors
+        self.index = None
+        if vectors is not None and len(vectors):
+            self.index = faiss.IndexFlatIP(vectors.shape[1])
+            self.index.add(vectors)
+
+    @classmethod
+    def build(cls, images: List[tuple], stats: Optional[dict] = None,
+              fingerprints: Optional[List[Optional[tuple]]] = None) -> "ImageIndex":
+        """Keeps the first image of each near-duplicate group and embeds the representatives' thumbnails.
+
+        `fingerprints` are `fingerprint_images(images)`, computed here when not given (ingest computes
+        them within its resource limits, so only small thumbnails reach this process).
+        """
+        if fingerprints is None:
+            fingerprints = fingerprint_images(images)
+        entries, duplicates, thumbnails = [], [], []
+        for (page_num, img_index, image), fp in zip(images, fingerprints):
+            if fp is None:
+                continue
+            image_hash, small = fp
+            for i, (_, _, _, kept_hash) in enumerate(entries):
+                if hamming(image_hash, kept_hash) <= config.IMAGE_DUPLICATE_DISTANCE:
+                    duplicates[i].append((page_num, img_index))
+                    break
+            else:
+                entries.append((page_num, img_index, image, image_hash))
+                duplicates.append([])
+                thumbnails.append(small)
+
+        vectors = None
+        if entries and config.IMAGE_EMBEDDINGS_ENABLED:
+            try:
+                vectors = _embed(thumbnails)
+            except Exception as e:
+                print(f"Image embeddings unavailable, only similar-image search by hash will work: {e}")
+        if stats is not None:
+            stats['images_indexed'] = len(entries)
+            stats['image_duplicates'] = sum(len(group) for group in duplicates)
+        return cls(entries, duplicates, vectors)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def searchable(self) -> bool:
+        """Whether text and embedding search are available (hash matching always is)."""
+        return self.index is not None
+
+    def search_text(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Entries best matching a text description, as (entry number, cosine similarity)."""
+        if not self.searchable or not query.strip():
+            return []
+        return self._search(_embed([query]), k)
+
+    def search_image(self, image: Image.Image, k: int) -> List[Tuple[int, float]]:
+        """Entries most similar to `image`: near-duplicates by hash first, then by embedding similarity."""
+        image_hash, small = fingerprint(image)
+        exact = sorted(
+            (hamming(image_hash, kept_hash), i) for i, (_, _, _, kept_hash) in enumerate(self.entries)
+            if hamming(image_hash, kept_hash) <= config.IMAGE_DUPLICATE_DISTANCE
+        )
+        results = [(i, 1.0) for _, i in exact]
+        if self.searchable:
+            seen = {i for i, _ in results}
+            results += [hit for hit in self._search(_embed([small]), k) if hit[0] not in seen]
+        return results[:k]
+
+    def _search(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        scores, ids = self.index.search(vector, min(k, len(self.entries)))
+        return [(int(i), float(score)) for i, score in zip(ids[0], scores[0]) if i >= 0]
+
+    def label(self, i: int) -> str:
+        page_num, img_index, _, _ = self.entries[i]
+        copies = len(self.duplicates[i])
+        return f"Page {page_num}, Image {img_index}" + (f" (+{copies} similar)" if copies else "")
+
+    def to_parts(self) -> Tuple[dict, Optional[np.ndarray]]:
+        """JSON-able description (without pixels) and the vector matrix, for storing in a bundle."""
+        meta = {
+            'model': config.IMAGE_EMBEDDING_MODEL,
+            'entries': [
+                {'page': page_num, 'index': img_index, 'hash': f"{image_hash:016x}", 'duplicates': self.duplicates[i]}
+                for i, (page_num, img_index, _, image_hash) in enumerate(self.entries)
+            ],
+        }
+        return meta, self.vectors
+
+    @classmethod
+    def from_parts(cls, meta: dict, vectors: Optional[np.ndarray], images: List[tuple]) -> "ImageIndex":
+        """Rebuilds the index from `to_parts` output and the (page, index, image) list it was built from."""
+        by_key = {(page_num, img_index): image for page_num, img_index, image in images}
+        entries = [
+            (item['page'], item['index'], by_key[(item['page'], item['index'])], int(item['hash'], 16))
+            for item in meta['entries']
+        ]
+        duplicates = [[tuple(key) for key in item['duplicates']] for item in meta['entries']]
+        if meta.get('model') != config.IMAGE_EMBEDDING_MODEL:
+            vectors = None  # Embedded with a different model: keep hash search only
+        return cls(entries, duplicates, vectors)
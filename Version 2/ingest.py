@@ -0,0 +1,171 @@
+# ingest.py
+
+import multiprocessing
+import os
+import signal
+import time
+from typing import Optional
+import fitz  # PyMuPDF
+import config
+import image_index
+import ocr
+import pdf_processor
+import tables
+
+try:
+    import resource  # Unix only; memory caps are skipped elsewhere
+except ImportError:
+    resource = None
+
+class IngestError(Exception):
+    """Raised when a document is rejected instead of (partially) processed."""
+
+def preflight(file_path: str) -> dict:
+    """Cheap structural scan: page count and total image pixels, read without decoding anything."""
+    try:
+        with fitz.open(file_path) as doc:
+            pages = len(doc)
+            image_pixels = sum(
+                img[2] * img[3]
+                for page_num in range(min(pages, config.MAX_PAGES))
+                for img in doc.get_page_images(page_num)
+            )
+    except Exception as e:
+        raise IngestError(f"This file could not be opened as a PDF ({e}).")
+    return {'pages': pages, 'image_pixels': image_pixels, 'file_bytes': os.path.getsize(file_path)}
+
+def _needs_ocr(file_path: str) -> bool:
+    """Whether any page would be OCRed. OCR time is unbounded, so such documents are parsed in
+    the isolated worker, where MAX_INGEST_SECONDS applies."""
+    if not config.OCR_ENABLED or ocr.unavailable_reason():
+        return False
+    with fitz.open(file_path) as doc:
+        return any(
+            len(doc.load_page(page_num).get_text().strip()) < config.OCR_MIN_CHARS
+            for page_num in range(min(len(doc), config.INLINE_MAX_PAGES))
+        )
+
+def _parse(file_path: str, chunk_size: int, chunk_overlap: int) -> dict:
+    """Extracts chunks and images within the configured limits, noting anything that was cut.
+
+    Images stay encoded; decoding them happens only here for their (small) figure-index fingerprints,
+    so the result is cheap to send back from the worker.
+    """
+    stats, warnings = {}, []
+    info = preflight(file_path)
+    if info['pages'] > config.MAX_PAGES:
+        warnings.append(f"Only the first {config.MAX_PAGES} of {info['pages']} pages were processed.")
+
+    buffer, page_starts, chunks = pdf_processor.extract_document(
+        file_path, chunk_size, chunk_overlap, stats, config.MAX_PAGES
+    )
+    if stats.get('ocr_failed'):
+        warnings.append(f"{stats['ocr_failed']} pages without a text layer could not be OCRed; their text may be missing.")
+    if len(chunks) > config.MAX_CHUNKS:
+        warnings.append(f"Only the first {config.MAX_CHUNKS} of {len(chunks)} text chunks were indexed.")
+        chunks = chunks[:config.MAX_CHUNKS]
+
+    images = pdf_processor.extract_images_from_pdf(file_path, config.MAX_PAGES, config.MAX_TOTAL_IMAGE_PIXELS, stats)
+    if stats.get('images_skipped'):
+        warnings.append(f"{stats['images_skipped']} images were skipped for exceeding the image size limits.")
+    fingerprints = image_index.fingerprint_images(images)
+
+    table_index = tables.TableIndex(tables.extract_tables(file_path, config.MAX_PAGES) if config.TABLES_ENABLED else [])
+    stats['tables'] = len(table_index)
+    return {
+        'chunks': chunks, 'buffer': buffer, 'page_starts': page_starts, 'tables': table_index,
+        'images': images, 'fingerprints': fingerprints, 'stats': stats, 'warnings': warnings,
+    }
+
+def _worker(conn, file_path: str, chunk_size: int, chunk_overlap: int, memory_mb: int):
+    """Subprocess entry point: caps address space, parses, and sends the result back.
+
+    Starts a new session first, so the parent can kill the worker together with its OCR processes.
+    """
+    if hasattr(os, "setsid"):
+        os.setsid()
+    if resource is not None and memory_mb:
+        limit = memory_mb << 20
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    try:
+        conn.send(('ok', _parse(file_path, chunk_size, chunk_overlap)))
+    except MemoryError:
+        conn.send(('error', f"Processing needed more than the {memory_mb} MB memory limit."))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+def _kill_group(process):
+    """Kills the worker's process group (the worker and any OCR processes it started); falls back
+    to the worker alone where process groups are unavailable or it has not created its own yet."""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except (ProcessLookupError, PermissionError):
+            pass
+    if process.is_alive():
+        process.kill()
+
+def _parse_isolated(file_path: str, chunk_size: int, chunk_overlap: int) -> dict:
+    """Runs `_parse` in a spawned subprocess with a memory cap and wall-time limit."""
+    ctx = multiprocessing.get_context("spawn")
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_worker, args=(sender, file_path, chunk_size, chunk_overlap, config.WORKER_MEMORY_MB)
+    )
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(config.MAX_INGEST_SECONDS):
+            raise IngestError(f"Processing took longer than {config.MAX_INGEST_SECONDS}s and was stopped.")
+        try:
+            status, payload = receiver.recv()
+        except EOFError:
+            process.join(5)
+            hint = f", likely by exceeding the {config.WORKER_MEMORY_MB} MB memory limit" if (
+                process.exitcode is not None and process.exitcode < 0
+            ) else ""
+            raise IngestError(f"The document crashed its parse worker (exit code {process.exitcode}){hint}.")
+        if status == 'error':
+            raise IngestError(payload)
+        return payload
+    finally:
+        _kill_group(process)
+        process.join()
+        receiver.close()
+
+def ingest_pdf(file_path: str, chunk_size: int, chunk_overlap: int, isolate: Optional[bool] = None) -> dict:
+    """Parses a PDF under the configured resource limits.
+
+    Small documents are parsed in-process; anything above the inline thresholds, anything that
+    needs OCR (or everything, when `isolate` is set) runs in a memory-capped, time-limited
+    subprocess so a pathological file cannot take down the server. Returns chunks (with the document
+    buffer and page offsets they point into), a TableIndex, lazily decoded images with their
+    figure-index fingerprints (see ImageIndex.build), stats and user-facing warnings about partial
+    results; raises IngestError when the document is rejected.
+    """
+    start = time.perf_counter()
+    info = preflight(file_path)
+    if isolate is None:
+        isolate = (
+            info['pages'] > config.INLINE_MAX_PAGES
+            or info['image_pixels'] > config.INLINE_MAX_IMAGE_PIXELS
+            or info['file_bytes'] > config.INLINE_MAX_FILE_MB << 20
+            or _needs_ocr(file_path)
+        )
+    if isolate:
+        result = _parse_isolated(file_path, chunk_size, chunk_overlap)
+    else:
+        try:
+            result = _parse(file_path, chunk_size, chunk_overlap)
+        except IngestError:
+            raise
+        except MemoryError:
+            raise IngestError("Processing ran out of memory.")
+        except Exception as e:
+            raise IngestError(str(e)) from e
+    result['images'] = pdf_processor.open_images(result['images'])
+    result['stats'].update(info, isolated=isolate, parse_seconds=time.perf_counter() - start)
+    return result
@@ -0,0 +1,99 @@
+# lazy_imports.py
+#
+# Defers heavy imports (LangChain, torch, PyMuPDF, ollama) until first use so the
+# welcome screen renders immediately. Run `python lazy_imports.py` for a per-dependency
+# import-time profile.
+
+import importlib
+import subprocess
+import sys
+import threading
+import time
+import types
+from typing import Callable, Dict, List, Optional
+
+HEAVY_DEPENDENCIES = [
+    "fitz",
+    "ollama",
+    "faiss",
+    "torch",
+    "sentence_transformers",
+    "langchain_community.document_loaders",
+    "langchain_community.embeddings",
+    "langchain_community.vectorstores",
+    "langchain.text_splitter",
+]
+
+_load_times: Dict[str, float] = {}
+_lock = threading.Lock()
+_warm_up_thread = None
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        if self.__dict__['_module'] is None:
+            self.__dict__['_module'] = _timed_import(self.__name__)
+        return self.__dict__['_module']
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+def _timed_import(name: str) -> types.ModuleType:
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        _load_times[name] = time.perf_counter() - start
+        return module
+
+def lazy(name: str) -> LazyModule:
+    """Returns a proxy for `name` that is imported on first use."""
+    return LazyModule(name)
+
+def warm_up(names: List[str], after: Optional[Callable[[], None]] = None) -> threading.Thread:
+    """Imports `names` (then runs `after`) in a background thread, at most once per process."""
+    global _warm_up_thread
+
+    def run():
+        for name in names:
+            _timed_import(name)
+        if after is not None:
+            after()
+
+    with _lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=run, name="import-warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+def load_times() -> Dict[str, float]:
+    """Seconds spent importing each lazily loaded module in this process."""
+    return dict(_load_times)
+
+def profile_imports(names: List[str]) -> Dict[str, float]:
+    """Measures the cold import cost of each module in a fresh interpreter using `-X importtime`."""
+    costs = {}
+    for name in names:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {name}"],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            costs[name] = float("nan")
+            continue
+        for line in result.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == name:
+                costs[name] = int(parts[1]) / 1e6
+    return costs
+
+if __name__ == "__main__":
+    print(f"{'module':<40} {'cold import (s)':>16}")
+    for name, seconds in profile_imports(sys.argv[1:] or HEAVY_DEPENDENCIES).items():
+        print(f"{name:<40} {seconds:>16.3f}")
@@ -1,10 +1,15 @@
 # llm_handler.py
 
-import ollama
 from PIL import Image
 import io
 import base64
+import time
 import config
+from model_router import router
+from context_builder import build_context, estimate_tokens
+from chunk_store import expand_hits
+from tables import TableIndex, format_rows
+from typing import List, Optional
 
 def query_ollama_with_image(image: Image.Image, query: str) -> str:
     """Queries Ollama with an image and text, using base64 encoding."""
@@ -13,27 +18,56 @@ def query_ollama_with_image(image: Image.Image, query: str) -> str:
         image.save(buffered, format="PNG")
         img_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
 
-        response = ollama.chat(
-            model=config.OLLAMA_MODEL,
-            messages=[{
-                'role': 'user',
-                'content': query,
-                'images': [img_base64]
-            }]
-        )
+        response = router.chat('vision', [{
+            'role': 'user',
+            'content': query,
+            'images': [img_base64]
+        }])
         return response['message']['content']
     except Exception as e:
         return f"An error occurred while querying LLaVA: {e}"
 
-def get_text_chat_response(vectorstore, query: str, chat_history: list) -> str:
-    """Queries Ollama with context from the vector store for text-based chat."""
+def retrieve(vectorstore, query: str) -> List[tuple]:
+    """Embeds the query and returns the (document, distance) pairs its prompt context is built from."""
+    scored_docs = vectorstore.similarity_search_with_score(query, k=config.RETRIEVAL_MAX_K)
+    return expand_hits(
+        vectorstore, scored_docs, config.RETRIEVAL_MODE, config.RETRIEVAL_WINDOW_CHARS, config.PARENT_MAX_CHARS
+    )
+
+def _spans(scored_docs: List[tuple]) -> List[dict]:
+    """Retrieved passages by ascending distance as chunk id and character span, for recording sessions."""
+    spans = []
+    for doc, score in sorted(scored_docs, key=lambda pair: pair[1]):
+        start = doc.metadata.get('start_index', -1)
+        spans.append({
+            'chunk_id': doc.metadata.get('chunk_id'), 'page': doc.metadata.get('page'), 'start': start,
+            'end': start + len(doc.page_content) if start >= 0 else -1, 'distance': float(score),
+        })
+    return spans
+
+def get_text_chat_response(vectorstore, query: str, chat_history: list, stats: Optional[dict] = None,
+                           retrieved: Optional[List[tuple]] = None, tables: Optional[TableIndex] = None) -> str:
+    """Queries Ollama with context from the vector store for text-based chat.
+
+    If `stats` is given it is filled with the context budget, actual token usage, the retrieved spans,
+    the prompt and per-stage timings for this query (see session_log.py).
+    `retrieved` skips retrieval with results fetched ahead of time (see prefetch.py).
+    With `tables`, single-cell questions are answered directly and matching rows are put in the
+    prompt in place of most of the text context.
+    """
     try:
-        context_docs = vectorstore.similarity_search(query, k=4)
-        context = "\n".join([doc.page_content for doc in context_docs])
+        started = time.perf_counter()
+        if tables is not None and config.TABLE_DIRECT_ANSWERS:
+            direct = tables.answer(query)
+            if direct:
+                if stats is not None:
+                    stats.update(table_answer=True, prompt_tokens=0, model="table lookup", retrieved=[],
+                                 total_ms=(time.perf_counter() - started) * 1000)
+                return direct
 
         formatted_history = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_history])
 
-        prompt = f"""
+        prompt_template = """
         Use the following context from a PDF document and the conversation history to answer the question.
         If the answer is not in the context, say you don't know.
 
@@ -41,15 +75,52 @@ def get_text_chat_response(vectorstore, query: str, chat_history: list) -> str:
         {context}
 
         History:
-        {formatted_history}
+        {history}
 
         Question: {query}
         """
 
-        response = ollama.chat(
-            model=config.OLLAMA_MODEL,
-            messages=[{'role': 'user', 'content': prompt}]
+        overhead = estimate_tokens(prompt_template.format(context="", history=formatted_history, query=query))
+        token_budget = max(
+            config.MIN_CONTEXT_TOKENS,
+            config.CONTEXT_WINDOW_TOKENS - config.RESPONSE_TOKEN_RESERVE - overhead
+        )
+        table_rows = tables.relevant_rows(query, config.TABLE_MAX_ROWS) if tables is not None else []
+        table_context = format_rows(table_rows)
+        if table_rows:
+            token_budget = max(0, min(token_budget - estimate_tokens(table_context), config.TABLE_TEXT_CONTEXT_TOKENS))
+
+        start = time.perf_counter()
+        scored_docs = retrieved if retrieved is not None else retrieve(vectorstore, query)
+        retrieval_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        context, context_stats = build_context(scored_docs, token_budget)
+        if table_context:
+            context = f"{table_context}\n\n{context}" if context else table_context
+
+        prompt = prompt_template.format(context=context, history=formatted_history, query=query)
+        if stats is not None:
+            stats.update(context_stats)
+            stats['prompt'] = prompt
+            stats['prompt_tokens'] = estimate_tokens(prompt)
+            stats['retrieved'] = _spans(scored_docs)
+            stats['retrieval_ms'] = retrieval_seconds * 1000
+            stats['context_ms'] = (time.perf_counter() - start) * 1000
+            stats['prefetched'] = retrieved is not None
+            stats['table_rows'] = len(table_rows)
+
+        start = time.perf_counter()
+        response = router.chat(
+            'text',
+            [{'role': 'user', 'content': prompt}],
+            options={'num_ctx': config.CONTEXT_WINDOW_TOKENS}
         )
+        if stats is not None:
+            stats['model'] = response['model']
+            stats['llm_ms'] = (time.perf_counter() - start) * 1000
+            stats['total_ms'] = (time.perf_counter() - started) * 1000
         return response['message']['content']
     except Exception as e:
-        return f"An error occurred during chat: {e}"
\ No newline at end of file
+        if stats is not None:
+            stats['error'] = str(e)
+        return f"An error occurred during chat: {e}"
@@ -0,0 +1,83 @@
+# model_router.py
+
+import threading
+import time
+from typing import Dict, Optional
+import ollama
+import config
+
+class ModelRouter:
+    """Routes chat calls to a per-task Ollama model, falling back when the primary is overloaded."""
+
+    def __init__(self, models: Dict[str, str], fallbacks: Dict[str, str], max_in_flight: int, keep_alive: str):
+        self.models = models
+        self.fallbacks = fallbacks
+        self.max_in_flight = max_in_flight
+        self.keep_alive = keep_alive
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _model_stats(self, model: str) -> dict:
+        return self._stats.setdefault(
+            model, {'calls': 0, 'errors': 0, 'in_flight': 0, 'latency_ewma': 0.0, 'last_latency': 0.0}
+        )
+
+    def pick(self, task: str) -> str:
+        """Chooses the model for `task`: the primary unless it is saturated and a fallback is less loaded."""
+        primary = self.models[task]
+        fallback = self.fallbacks.get(task)
+        with self._lock:
+            busy = self._model_stats(primary)['in_flight']
+            if fallback and busy >= self.max_in_flight and self._model_stats(fallback)['in_flight'] < busy:
+                return fallback
+        return primary
+
+    def _call(self, model: str, messages: list, options: Optional[dict]) -> dict:
+        with self._lock:
+            self._model_stats(model)['in_flight'] += 1
+        start = time.perf_counter()
+        try:
+            return ollama.chat(model=model, messages=messages, options=options, keep_alive=self.keep_alive)
+        except Exception:
+            with self._lock:
+                self._model_stats(model)['errors'] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self._model_stats(model)
+                stats['in_flight'] -= 1
+                stats['calls'] += 1
+                stats['last_latency'] = elapsed
+                stats['latency_ewma'] = elapsed if stats['calls'] == 1 else 0.8 * stats['latency_ewma'] + 0.2 * elapsed
+
+    def chat(self, task: str, messages: list, options: Optional[dict] = None) -> dict:
+        """Sends `messages` to the model routed for `task`, retrying once on the fallback if the call fails."""
+        model = self.pick(task)
+        try:
+            return self._call(model, messages, options)
+        except Exception:
+            fallback = self.fallbacks.get(task)
+            if not fallback or fallback == model:
+                raise
+            return self._call(fallback, messages, options)
+
+    def warm_up(self):
+        """Loads every configured model into memory with the configured keep-alive."""
+        for model in dict.fromkeys(self.models.values()):
+            try:
+                ollama.generate(model=model, prompt="", keep_alive=self.keep_alive)
+            except Exception as e:
+                print(f"Error warming up {model}: {e}")
+
+    def stats(self) -> Dict[str, dict]:
+        """Snapshot of per-model call counts, errors, current load and latency."""
+        with self._lock:
+            return {model: dict(stats) for model, stats in self._stats.items()}
+
+router = ModelRouter(
+    models={'text': config.TEXT_MODEL, 'vision': config.VISION_MODEL},
+    fallbacks=config.MODEL_FALLBACKS,
+    max_in_flight=config.MODEL_MAX_IN_FLIGHT,
+    keep_alive=config.MODEL_KEEP_ALIVE,
+)
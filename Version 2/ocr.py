@@ -0,0 +1,91 @@
+# ocr.py
+
+import fitz  # PyMuPDF
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import config
+
+def page_hash(doc: fitz.Document, page_num: int) -> str:
+    """Hashes a page's content streams and embedded images, plus the OCR settings."""
+    page = doc.load_page(page_num)
+    digest = hashlib.sha256(page.read_contents())
+    for img in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(img[0]) or b"")
+    digest.update(f"{config.OCR_DPI}:{config.OCR_LANGUAGE}".encode())
+    return digest.hexdigest()
+
+def _cache_path(key: str) -> str:
+    return os.path.join(config.OCR_CACHE_DIR, f"{key}.txt")
+
+def _ocr_page(args: Tuple[str, int]) -> str:
+    """Renders one page and runs Tesseract on it (executed in a worker process)."""
+    import pytesseract
+    from PIL import Image
+
+    file_path, page_num = args
+    with fitz.open(file_path) as doc:
+        pix = doc.load_page(page_num).get_pixmap(dpi=config.OCR_DPI, colorspace=fitz.csGRAY)
+        image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    return pytesseract.image_to_string(image, lang=config.OCR_LANGUAGE)
+
+@lru_cache(maxsize=1)
+def unavailable_reason() -> Optional[str]:
+    """Why OCR cannot run here (pytesseract or the tesseract binary missing), or None if it can."""
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+def ocr_pages(file_path: str, page_nums: List[int]) -> Tuple[Dict[int, str], dict]:
+    """OCRs the given (0-based) pages in a process pool, reusing cached results by page hash.
+
+    Pages that could not be OCRed (including all of them when Tesseract is missing) are left out
+    of the results and counted in the stats as `ocr_failed`.
+    """
+    start = time.perf_counter()
+    results, pending = {}, {}
+    with fitz.open(file_path) as doc:
+        for page_num in page_nums:
+            key = page_hash(doc, page_num)
+            if os.path.exists(_cache_path(key)):
+                with open(_cache_path(key), encoding="utf-8") as f:
+                    results[page_num] = f.read()
+            else:
+                pending[page_num] = key
+
+    failed = 0
+    reason = unavailable_reason() if pending else None
+    if reason:
+        print(f"OCR unavailable, keeping the text layer of {len(pending)} pages: {reason}")
+        failed = len(pending)
+    elif pending:
+        os.makedirs(config.OCR_CACHE_DIR, exist_ok=True)
+        workers = min(config.OCR_WORKERS, len(pending))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {page_num: pool.submit(_ocr_page, (file_path, page_num)) for page_num in pending}
+            for page_num, future in futures.items():
+                try:
+                    text = future.result()
+                except Exception as e:
+                    print(f"Error running OCR on page {page_num + 1}: {e}")
+                    failed += 1
+                    continue
+                results[page_num] = text
+                with open(_cache_path(pending[page_num]), "w", encoding="utf-8") as f:
+                    f.write(text)
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'ocr_pages': len(page_nums),
+        'ocr_failed': failed,
+        'ocr_cached': len(page_nums) - len(pending),
+        'ocr_seconds': elapsed,
+        'ocr_pages_per_sec': (len(pending) - failed) / elapsed if pending and elapsed > 0 else 0.0,
+    }
+    return results, stats
@@ -0,0 +1,143 @@
+# onnx_embeddings.py
+#
+# CPU embedding backend running an ONNX export of config.EMBEDDING_MODEL_NAME with ONNX Runtime,
+# optionally int8-quantized. Vectors are pooled (and normalized) the way the model's sentence-transformers
+# pipeline does, so they can be searched against indexes built with the PyTorch path.
+# Export ahead of time with: python onnx_embeddings.py (otherwise the first use exports it)
+
+import json
+import os
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+import config
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+POOLING_FILE = "pooling.json"
+POOLING_MODES = ('mean', 'cls', 'max')
+
+def model_dir(model_name: str = config.EMBEDDING_MODEL_NAME) -> str:
+    return os.path.join(config.EMBEDDING_ONNX_DIR, model_name.replace("/", "__"))
+
+def pipeline_pooling(st_model) -> dict:
+    """Pooling mode, normalization and input token limit of a sentence-transformers pipeline; raises
+    ValueError for pipelines this backend cannot reproduce (extra Dense layers, combined pooling modes, ...)."""
+    kinds = [type(module).__name__ for module in st_model]
+    if kinds not in (['Transformer', 'Pooling'], ['Transformer', 'Pooling', 'Normalize']):
+        raise ValueError(f"The ONNX backend does not support the pipeline {' -> '.join(kinds)}")
+    mode = st_model[1].get_pooling_mode_str()
+    if mode not in POOLING_MODES:
+        raise ValueError(f"The ONNX backend does not support '{mode}' pooling")
+    return {'pooling': mode, 'normalize': kinds[-1] == 'Normalize', 'max_seq_length': st_model.max_seq_length}
+
+def export_model(model_name: str = config.EMBEDDING_MODEL_NAME, quantize: bool = True) -> str:
+    """Exports the transformer to ONNX (plus a dynamically quantized int8 copy) with its tokenizer."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    pooling = pipeline_pooling(st_model)
+    directory = model_dir(model_name)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, POOLING_FILE), "w") as f:
+        json.dump(pooling, f)
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    tokenizer.save_pretrained(directory)
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            os.path.join(directory, FP32_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(
+            os.path.join(directory, FP32_FILE), os.path.join(directory, INT8_FILE), weight_type=QuantType.QInt8
+        )
+    return directory
+
+def _read_pooling(directory: str) -> dict:
+    """The export's pooling.json, or {} when the model was not exported (or by an older version)."""
+    try:
+        with open(os.path.join(directory, POOLING_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence embeddings from an ONNX Runtime session with a configurable intra-op thread count."""
+
+    def __init__(self, model_name: str = config.EMBEDDING_MODEL_NAME, quantized: bool = False,
+                 threads: int = config.EMBEDDING_THREADS, batch_size: int = config.EMBEDDING_BATCH_SIZE,
+                 max_tokens: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        directory = model_dir(model_name)
+        model_path = os.path.join(directory, INT8_FILE if quantized else FP32_FILE)
+        if not os.path.exists(model_path) or 'max_seq_length' not in _read_pooling(directory):
+            print(f"Exporting {model_name} to ONNX in {directory} (one-time)...")
+            export_model(model_name, quantize=quantized)
+        pooling = _read_pooling(directory)
+        self.pooling, self.normalize = pooling['pooling'], pooling['normalize']
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {inp.name for inp in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, "tokenizer.json"))
+        # Truncate where the PyTorch pipeline does, so vectors match indexes built with it
+        self.tokenizer.enable_truncation(max_length=max_tokens or pooling['max_seq_length'])
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+            'attention_mask': mask,
+            'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+        weights = mask[:, :, None].astype(np.float32)
+        if self.pooling == 'cls':
+            pooled = hidden[:, 0]
+        elif self.pooling == 'max':
+            pooled = np.where(weights > 0, hidden, -1e9).max(axis=1)
+        else:
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        if not self.normalize:
+            return pooled
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeds in batches of similar length so little compute is spent on padding."""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for begin in range(0, len(order), self.batch_size):
+            batch = order[begin:begin + self.batch_size]
+            for i, vector in zip(batch, self._embed([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+if __name__ == "__main__":
+    print(f"Exported to {export_model()}")
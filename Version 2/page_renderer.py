@@ -0,0 +1,155 @@
+# page_renderer.py
+
+import fitz  # PyMuPDF
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Tuple
+from PIL import Image
+import config
+
+def page_count(file_path: str) -> int:
+    with fitz.open(file_path) as doc:
+        return len(doc)
+
+FULL_PAGE = (0.0, 0.0, 1.0, 1.0)
+
+def _clip(rect: fitz.Rect, box: Tuple[float, float, float, float]) -> fitz.Rect:
+    """The part of `rect` given as fractions (left, top, right, bottom) of its size."""
+    left, top, right, bottom = box
+    return fitz.Rect(
+        rect.x0 + left * rect.width, rect.y0 + top * rect.height,
+        rect.x0 + right * rect.width, rect.y0 + bottom * rect.height,
+    )
+
+def vision_dpi(file_path: str, page_num: int, box: Tuple[float, float, float, float] = FULL_PAGE) -> int:
+    """DPI at which the page (or the `box` region of it) has a longer side of the vision model's
+    preferred input size. Regions may go above RENDER_MAX_DPI, since they come out no larger."""
+    with fitz.open(file_path) as doc:
+        rect = _clip(doc.load_page(page_num).rect, box)
+    dpi = 72 * config.VISION_TARGET_PIXELS / max(rect.width, rect.height, 1)
+    max_dpi = config.RENDER_MAX_DPI if box == FULL_PAGE else config.RENDER_REGION_MAX_DPI
+    return int(min(max_dpi, max(config.RENDER_MIN_DPI, dpi)))
+
+def _render(args: Tuple[str, int, int, Tuple[float, float, float, float]]) -> bytes:
+    """Renders one page, or a region of it, to PNG bytes (executed in a worker process)."""
+    file_path, page_num, dpi, box = args
+    with fitz.open(file_path) as doc:
+        page = doc.load_page(page_num)
+        clip = None if box == FULL_PAGE else _clip(page.rect, box)
+        return page.get_pixmap(dpi=dpi, clip=clip).tobytes("png")
+
+class PageCache:
+    """Two-level cache of rendered pages: an LRU in memory and a size-bounded directory on disk."""
+
+    def __init__(self, directory: str, max_memory_bytes: int, max_disk_bytes: int):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        self._remember(key, data)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(key), "wb") as f:
+            f.write(data)
+        self._trim_disk()
+
+    def _remember(self, key: str, data: bytes):
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= len(self._memory.pop(key))
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _trim_disk(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+cache = PageCache(config.RENDER_CACHE_DIR, config.RENDER_CACHE_MEMORY_MB << 20, config.RENDER_CACHE_DISK_MB << 20)
+_pool = None
+_pending = {}
+_pending_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=config.RENDER_WORKERS)
+    return _pool
+
+def render_page_async(file_path: str, doc_hash: str, page_num: int, dpi: Optional[int] = None,
+                      box: Tuple[float, float, float, float] = FULL_PAGE) -> Future:
+    """Returns a future of the page's (or region's) PNG bytes, served from cache or rendered in the worker pool."""
+    if not doc_hash:
+        raise ValueError("A document hash is required: it keys the render cache shared by all sessions")
+    box = tuple(round(v, 4) for v in box)
+    dpi = dpi or vision_dpi(file_path, page_num, box)
+    key = f"{doc_hash}_{page_num}_{dpi}"
+    if box != FULL_PAGE:
+        key += "_" + "_".join(f"{v:g}" for v in box)
+    data = cache.get(key)
+    if data is not None:
+        future = Future()
+        future.set_result(data)
+        return future
+
+    with _pending_lock:
+        if key in _pending:
+            return _pending[key]
+        future = _get_pool().submit(_render, (file_path, page_num, dpi, box))
+        _pending[key] = future
+
+    def _store(done: Future):
+        with _pending_lock:
+            _pending.pop(key, None)
+        if done.exception() is None:
+            cache.put(key, done.result())
+
+    future.add_done_callback(_store)
+    return future
+
+def render_page(file_path: str, doc_hash: str, page_num: int, dpi: Optional[int] = None,
+                box: Tuple[float, float, float, float] = FULL_PAGE) -> Image.Image:
+    """Renders a (0-based) page for the vision model, blocking until it is ready.
+
+    With `box` (fractions left, top, right, bottom of the page) only that region is rendered, at the
+    DPI that gives it the vision model's input size rather than cropping a full-page render.
+    """
+    data = render_page_async(file_path, doc_hash, page_num, dpi, box).result()
+    return Image.open(io.BytesIO(data))
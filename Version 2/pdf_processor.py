@@ -3,34 +3,81 @@
 import fitz  # PyMuPDF
 from PIL import Image
 import io
+from itertools import islice
+import numpy as np
 from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import List
+from langchain_core.documents import Document
+from typing import List, Optional, Tuple
+import config
+import chunker
+import ocr
 
-def extract_text_and_split(file_path: str, chunk_size: int, chunk_overlap: int) -> List[str]:
-    """Loads text from a PDF and splits it into chunks."""
+Image.MAX_IMAGE_PIXELS = config.MAX_SINGLE_IMAGE_PIXELS  # Arms PIL's decompression-bomb check as a backstop
+
+def load_page_texts(file_path: str, stats: Optional[dict] = None, max_pages: Optional[int] = None) -> List[str]:
+    """Loads the text of every page (or the first `max_pages`), OCRing pages that have no text layer."""
     loader = PyPDFLoader(file_path)
-    documents = loader.load()
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
-    )
-    texts = text_splitter.split_documents(documents)
-    return texts
-
-def extract_images_from_pdf(file_path: str) -> List[tuple]:
-    """Extracts all images from a PDF file."""
+    page_texts = [doc.page_content for doc in islice(loader.lazy_load(), max_pages)]
+
+    scanned = [i for i, text in enumerate(page_texts) if len(text.strip()) < config.OCR_MIN_CHARS]
+    if scanned and config.OCR_ENABLED:
+        ocr_texts, ocr_stats = ocr.ocr_pages(file_path, scanned)
+        for i in scanned:
+            page_texts[i] = ocr_texts.get(i, page_texts[i])  # Keep the (thin) text layer if OCR failed
+        if stats is not None:
+            stats.update(ocr_stats)
+    return page_texts
+
+def extract_text_and_split(file_path: str, chunk_size: int, chunk_overlap: int, stats: Optional[dict] = None,
+                           max_pages: Optional[int] = None) -> List[str]:
+    """Loads text from a PDF and splits the whole document into sentence-aligned chunks."""
+    return extract_document(file_path, chunk_size, chunk_overlap, stats, max_pages)[2]
+
+def extract_document(file_path: str, chunk_size: int, chunk_overlap: int, stats: Optional[dict] = None,
+                     max_pages: Optional[int] = None) -> Tuple[str, np.ndarray, List[Document]]:
+    """Like `extract_text_and_split`, but also returns the document buffer and page start offsets
+    the chunks point into, so surrounding text can be read back by offset at query time."""
+    buffer, page_starts = chunker.build_buffer(load_page_texts(file_path, stats, max_pages))
+    return buffer, page_starts, chunker.chunk_buffer(buffer, page_starts, file_path, chunk_size, chunk_overlap)
+
+def extract_images_from_pdf(file_path: str, max_pages: Optional[int] = None, max_total_pixels: Optional[int] = None,
+                            stats: Optional[dict] = None) -> List[tuple]:
+    """Extracts images from a PDF file as (page, index, encoded bytes), skipping any over
+    config.MAX_SINGLE_IMAGE_PIXELS or in a format PIL cannot read.
+
+    Nothing is decoded: sizes are read from the PDF, and the bytes are cheap to send between
+    processes (see `open_images`). Extraction stops once `max_total_pixels` would be exceeded.
+    """
     images = []
+    skipped = 0
+    total_pixels = 0
     try:
         doc = fitz.open(file_path)
-        for page_num in range(len(doc)):
+        for page_num in range(min(len(doc), max_pages or len(doc))):
             for img_index, img in enumerate(doc.get_page_images(page_num)):
-                xref = img[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                image = Image.open(io.BytesIO(image_bytes))
-                images.append((page_num + 1, img_index + 1, image))
+                xref, width, height = img[0], img[2], img[3]
+                if width * height > config.MAX_SINGLE_IMAGE_PIXELS or (
+                    max_total_pixels is not None and total_pixels + width * height > max_total_pixels
+                ):
+                    skipped += 1
+                    continue
+                try:
+                    image_bytes = doc.extract_image(xref)["image"]
+                    Image.open(io.BytesIO(image_bytes)).close()  # Reads the header only
+                except Exception as e:
+                    print(f"Error extracting image {img_index + 1} on page {page_num + 1}: {e}")
+                    skipped += 1
+                    continue
+                total_pixels += width * height
+                images.append((page_num + 1, img_index + 1, image_bytes))
         doc.close()
     except Exception as e:
         print(f"Error extracting images: {e}")
-    return images
\ No newline at end of file
+    if stats is not None:
+        stats['images_skipped'] = skipped
+        stats['image_pixels'] = total_pixels
+    return images
+
+def open_images(images: List[tuple]) -> List[tuple]:
+    """(page, index, PIL image) for `extract_images_from_pdf` output; pixels are decoded on first use."""
+    return [(page_num, img_index, Image.open(io.BytesIO(data))) for page_num, img_index, data in images]
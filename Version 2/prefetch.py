@@ -0,0 +1,101 @@
+# prefetch.py
+
+import re
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+import config
+import llm_handler
+
+_executor = ThreadPoolExecutor(max_workers=config.PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z-]{3,}")
+_CLAUSE = re.compile(r"[.,;:!?()\n]")
+_STOPWORDS = frozenset(
+    "about above after again also among because been before being below between both could does doing down "
+    "during each from further have having here into itself just more most other over same should some such "
+    "than that their them then there these they this those through under until very were what when where "
+    "which while will with would your document context answer question know".split()
+)
+
+def normalize(query: str) -> str:
+    """Cache key for a question: whitespace collapsed, trailing punctuation ignored."""
+    return " ".join(query.split()).rstrip(" ?.!")
+
+def suggest_follow_ups(query: str, answer: str, count: int) -> List[str]:
+    """Likely follow-up questions about the answer's most frequent terms the question did not mention.
+
+    Two-word phrases ("angular momentum") are preferred over single words.
+    """
+    asked = {word.lower() for word in _WORD.findall(query)}
+    phrases, words = Counter(), Counter()
+    for clause in _CLAUSE.split(answer):
+        terms = [word.lower() for word in _WORD.findall(clause)]
+        content = [term if term not in _STOPWORDS and term not in asked else None for term in terms]
+        words.update(term for term in content if term)
+        phrases.update(f"{a} {b}" for a, b in zip(content, content[1:]) if a and b)
+
+    topics = [phrase for phrase, n in phrases.most_common() if n > 1 or len(phrases) <= count][:count]
+    for word, _ in words.most_common():
+        if len(topics) >= count:
+            break
+        if not any(word in topic.split() for topic in topics):
+            topics.append(word)
+    return [f"What does the document say about {topic}?" for topic in topics]
+
+class RetrievalPrefetcher:
+    """Runs retrieval for one session's likely next questions in the background and caches the results.
+
+    Prefetches stop once `max_wasted` of them have gone unused, capping speculative work per session.
+    """
+
+    def __init__(self, vectorstore, max_wasted: int, max_entries: int):
+        self.vectorstore = vectorstore
+        self.max_wasted = max_wasted
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._launched = 0
+        self._used = 0
+        self._lookups = 0
+
+    def prefetch(self, query: str) -> bool:
+        """Starts retrieval for `query` unless it is cached, too short, or the waste cap is reached."""
+        key = normalize(query)
+        with self._lock:
+            if len(key) < config.PREFETCH_MIN_CHARS or key in self._entries:
+                return False
+            if self._launched - self._used >= self.max_wasted:
+                return False
+            self._launched += 1
+            self._entries[key] = _executor.submit(llm_handler.retrieve, self.vectorstore, key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def take(self, query: str) -> Optional[List[tuple]]:
+        """Prefetched results for `query` (waiting if still running), or None on a miss."""
+        with self._lock:
+            self._lookups += 1
+            future: Optional[Future] = self._entries.pop(normalize(query), None)
+        if future is None:
+            return None
+        try:
+            result = future.result()
+        except Exception:
+            return None
+        with self._lock:
+            self._used += 1
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'lookups': self._lookups,
+                'hits': self._used,
+                'hit_rate': self._used / self._lookups if self._lookups else 0.0,
+                'prefetched': self._launched,
+                'wasted': self._launched - self._used,
+                'max_wasted': self.max_wasted,
+            }
@@ -0,0 +1,87 @@
+# session_log.py
+
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+import config
+
+# Settings that shape retrieval and the prompt; recorded with every question so replays can restore them.
+RECORDED_SETTINGS = (
+    'EMBEDDING_MODEL_NAME', 'EMBEDDING_BACKEND', 'EMBEDDING_MAX_TOKENS', 'TEXT_MODEL',
+    'DEFAULT_CHUNK_SIZE', 'DEFAULT_CHUNK_OVERLAP', 'COMPACT_CHUNK_STORE',
+    'CONTEXT_WINDOW_TOKENS', 'RESPONSE_TOKEN_RESERVE', 'MIN_CONTEXT_TOKENS', 'CHARS_PER_TOKEN',
+    'RETRIEVAL_MIN_K', 'RETRIEVAL_MAX_K', 'RETRIEVAL_SCORE_GAP', 'RETRIEVAL_MODE', 'RETRIEVAL_WINDOW_CHARS',
+    'PARENT_MAX_CHARS', 'MERGE_SLACK_CHARS', 'REDUNDANCY_THRESHOLD',
+    'TABLES_ENABLED', 'TABLE_DIRECT_ANSWERS', 'TABLE_MAX_ROWS', 'TABLE_TEXT_CONTEXT_TOKENS',
+)
+STAGES = ('retrieval', 'context', 'llm', 'total')
+
+def settings_snapshot(chunk_size: Optional[int] = None, chunk_overlap: Optional[int] = None) -> dict:
+    """Current values of RECORDED_SETTINGS, with the chunking actually used for the document."""
+    settings = {name: getattr(config, name) for name in RECORDED_SETTINGS}
+    if chunk_size is not None:
+        settings['DEFAULT_CHUNK_SIZE'] = chunk_size
+    if chunk_overlap is not None:
+        settings['DEFAULT_CHUNK_OVERLAP'] = chunk_overlap
+    return settings
+
+def make_record(session_id: str, document: dict, settings: dict, query: str, history: list, stats: dict) -> dict:
+    """One replayable question: what was asked, what was retrieved, and how long each stage took.
+
+    `history` is the conversation before `query`; `stats` comes from llm_handler.get_text_chat_response.
+    """
+    record = {
+        'session': session_id,
+        'time': time.time(),
+        'document': document,
+        'settings': settings,
+        'query': query,
+        'history': [{'role': msg['role'], 'content': msg['content']} for msg in history],
+        'retrieved': stats.get('retrieved', []),
+        'k': stats.get('k', 0),
+        'prompt_tokens': stats.get('prompt_tokens', 0),
+        'timings': {stage: stats[f"{stage}_ms"] for stage in STAGES if f"{stage}_ms" in stats},
+        'model': stats.get('model'),
+        'table_answer': bool(stats.get('table_answer')),
+        'prefetched': bool(stats.get('prefetched')),
+    }
+    if config.SESSION_LOG_PROMPTS and 'prompt' in stats:
+        record['prompt'] = stats['prompt']
+    if 'error' in stats:
+        record['error'] = stats['error']
+    return record
+
+class SessionRecorder:
+    """Appends records as JSON lines; safe to share between sessions."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, *args, **kwargs):
+        """Builds a record (see `make_record`) and appends it; failures are reported, never raised."""
+        try:
+            line = json.dumps(make_record(*args, **kwargs))
+            with self._lock:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception as e:
+            print(f"Error recording session: {e}")
+
+def read_records(path: str) -> List[dict]:
+    """Records from a session log, skipping lines that are not valid JSON (e.g. a torn final write)."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Skipping malformed session record on line {line_num}")
+    return records
+
+recorder = SessionRecorder(config.SESSION_LOG_PATH)
@@ -0,0 +1,187 @@
+# tables.py
+
+import math
+import re
+from collections import defaultdict
+from typing import List, Optional, Tuple
+import fitz  # PyMuPDF
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+_NUMBER = re.compile(r"[^\w-]*(-?\d[\d,]*(?:\.\d+)?)")  # Leading number, allowing a currency/approx prefix
+_STOPWORDS = frozenset(
+    "a an and are at be by does for from has have how in is it its of on or the to was what which who with "
+    "value values table show tell me give".split()
+)
+_HIGHEST = frozenset("max maximum highest largest biggest most greatest top".split())
+_LOWEST = frozenset("min minimum lowest smallest least fewest".split())
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+def _clean(cell) -> str:
+    return " ".join(str(cell).split()) if cell is not None else ""
+
+class Table:
+    """One extracted table: column names, rows of cell strings, and where it sits in the PDF."""
+
+    def __init__(self, page: int, index: int, header: List[str], rows: List[List[str]]):
+        self.page = page
+        self.index = index
+        self.header = header
+        self.rows = rows
+
+    def to_dict(self) -> dict:
+        return {'page': self.page, 'index': self.index, 'header': self.header, 'rows': self.rows}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Table":
+        return cls(data['page'], data['index'], data['header'], data['rows'])
+
+def extract_tables(file_path: str, max_pages: Optional[int] = None) -> List[Table]:
+    """Finds ruled and aligned tables with PyMuPDF's layout analysis and keeps them as structured rows."""
+    tables = []
+    try:
+        doc = fitz.open(file_path)
+        for page_num in range(min(len(doc), max_pages or len(doc))):
+            for index, found in enumerate(doc[page_num].find_tables().tables):
+                data = [[_clean(cell) for cell in row] for row in found.extract()]
+                header = [_clean(name) for name in found.header.names]
+                rows = data if found.header.external else data[1:]
+                rows = [row for row in rows if any(row)]
+                if len(header) < 2 or not rows:
+                    continue
+                header = [name or f"Column {i + 1}" for i, name in enumerate(header)]
+                tables.append(Table(page_num + 1, index + 1, header, rows))
+        doc.close()
+    except Exception as e:
+        print(f"Error extracting tables: {e}")
+    return tables
+
+class TableIndex:
+    """Inverted index over table cells and headers for cell-level lookups without the vector store."""
+
+    def __init__(self, tables: List[Table]):
+        self.tables = tables
+        self._postings = defaultdict(set)  # cell token -> {(table, row)}
+        for t, table in enumerate(tables):
+            for r, row in enumerate(table.rows):
+                for cell in row:
+                    for token in tokenize(cell):
+                        self._postings[token].add((t, r))
+        self._num_rows = max(1, sum(len(table.rows) for table in tables))
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def _idf(self, token: str) -> float:
+        return math.log(1 + self._num_rows / len(self._postings[token]))
+
+    def _columns(self, table: Table, tokens: set, exclude: set = frozenset()) -> List[int]:
+        """Columns whose header shares the most tokens with the query (ties are all returned)."""
+        scores = [
+            (len(tokens & set(tokenize(name))), c) for c, name in enumerate(table.header) if c not in exclude
+        ]
+        best = max((score for score, _ in scores), default=0)
+        return [c for score, c in scores if score == best] if best else []
+
+    def lookup(self, query: str, max_rows: int) -> List[Tuple[Table, int, float]]:
+        """Rows whose cells match the query, best first, as (table, row index, score)."""
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            for key in self._postings.get(token, ()):
+                scores[key] += self._idf(token)
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:max_rows]
+        return [(self.tables[t], r, score) for (t, r), score in ranked]
+
+    def answer(self, query: str) -> Optional[str]:
+        """A direct answer when the query names exactly one cell (a row key plus a column), or asks for a
+        column's highest/lowest value, and every other content word of the query is accounted for by
+        the table; None when the question needs the LLM."""
+        tokens = set(tokenize(query))
+        matches = self.lookup(query, 2)
+        if matches:
+            table, r, score = matches[0]
+            if len(matches) > 1 and matches[1][2] >= score:
+                return None  # Ambiguous: several rows match equally well
+            row = table.rows[r]
+            keys = {c for c, cell in enumerate(row) if tokens & set(tokenize(cell))}
+            columns = self._columns(table, tokens, exclude=keys)
+            if len(columns) != 1 or not row[columns[0]]:
+                return None
+            explained = set(tokenize(table.header[columns[0]]))
+            for c in keys:
+                explained.update(tokenize(row[c]), tokenize(table.header[c]))
+            if tokens - explained:
+                return None  # The question says more than "this column of this row" (e.g. "price of oil in 2023")
+            key = ", ".join(row[c] for c in sorted(keys))
+            return f"{table.header[columns[0]]} for {key}: **{row[columns[0]]}** (table on page {table.page})"
+
+        extremes = tokens & (_HIGHEST | _LOWEST)
+        if not extremes:
+            return None
+        candidates = []
+        for table in self.tables:
+            columns = [
+                c for c in self._columns(table, tokens)
+                if sum(_number(row[c]) is not None for row in table.rows) * 2 > len(table.rows)
+            ]
+            if len(columns) != 1:
+                continue
+            direction = extremes - set(tokenize(table.header[columns[0]]))  # "max" in "Max torque" is a name
+            if bool(direction & _HIGHEST) == bool(direction & _LOWEST):
+                continue
+            header_tokens = {token for name in table.header for token in tokenize(name)}
+            if not tokens - direction - header_tokens:
+                candidates.append((table, columns[0], 'highest' if direction & _HIGHEST else 'lowest'))
+        if len(candidates) != 1:
+            return None
+        table, column, extreme = candidates[0]
+        values = [(_number(row[column]), row) for row in table.rows if _number(row[column]) is not None]
+        if not values:
+            return None
+        value, row = (max if extreme == 'highest' else min)(values, key=lambda pair: pair[0])
+        label = row[0] if column != 0 else row[1]
+        return (f"{label} has the {extreme} {table.header[column]}: **{row[column]}** "
+                f"(table on page {table.page})")
+
+    def relevant_rows(self, query: str, max_rows: int) -> List[Tuple[Table, int, float]]:
+        """Rows worth putting in the prompt: matching rows of tables whose headers the query mentions,
+        or, when no row matches, every row of such tables that are small enough."""
+        tokens = set(tokenize(query)) - _HIGHEST - _LOWEST
+        mentioned = {id(table) for table in self.tables if self._columns(table, tokens)}
+        rows = [match for match in self.lookup(query, max_rows * 4) if id(match[0]) in mentioned][:max_rows]
+        if rows:
+            return rows
+        for table in self.tables:
+            if id(table) in mentioned and len(rows) + len(table.rows) <= max_rows:
+                rows += [(table, r, 0.0) for r in range(len(table.rows))]
+        return rows
+
+    def to_json(self) -> list:
+        return [table.to_dict() for table in self.tables]
+
+    @classmethod
+    def from_json(cls, data: list) -> "TableIndex":
+        return cls([Table.from_dict(item) for item in data])
+
+def _number(cell: str) -> Optional[float]:
+    match = _NUMBER.match(cell)
+    if not match:
+        return None
+    try:
+        return float(match.group(1).replace(",", ""))
+    except ValueError:
+        return None
+
+def format_rows(matches: List[Tuple[Table, int, float]]) -> str:
+    """Matched rows grouped under their table's header, compact enough to put in a prompt."""
+    grouped = defaultdict(list)
+    for table, r, _ in matches:
+        grouped[id(table)].append((table, r))
+    blocks = []
+    for rows in grouped.values():
+        table = rows[0][0]
+        lines = [f"Table {table.index} on page {table.page}:", " | ".join(table.header)]
+        lines += [" | ".join(table.rows[r]) for _, r in sorted(rows, key=lambda pair: pair[1])]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
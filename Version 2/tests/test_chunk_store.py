@@ -0,0 +1,34 @@
+# tests/test_chunk_store.py
+
+import chunker
+from chunk_store import ChunkStore
+
+def _store(pages):
+    buffer, page_starts = chunker.build_buffer(pages)
+    docs = chunker.chunk_buffer(buffer, page_starts, "doc.pdf", 200, 0)
+    return buffer, docs, ChunkStore.from_buffer(docs, buffer, page_starts)
+
+def _check_window(pages, window_chars):
+    buffer, docs, store = _store(pages)
+    i = len(docs) // 2
+    text, char_start = store.context(i, 'window', window_chars, 4000)
+    assert buffer[char_start:char_start + len(text)] == text
+    assert docs[i].page_content in text
+    extra = len(text) - len(docs[i].page_content)
+    return extra
+
+def test_window_is_measured_in_characters():
+    ascii_extra = _check_window(["Plain sentence number one here. " * 60], 150)
+    greek_extra = _check_window(["Ελληνική πρόταση με αρκετές λέξεις. " * 60], 150)
+    cjk_extra = _check_window(["这是一个关于扭矩的句子。 " * 120], 150)
+    for extra in (ascii_extra, greek_extra, cjk_extra):
+        assert 150 <= extra <= 300
+
+def test_page_cap_is_measured_in_characters():
+    page = "Ελληνική πρόταση με αρκετές λέξεις. " * 30  # ~1080 characters, ~2000 UTF-8 bytes
+    buffer, docs, store = _store([page, page])
+    text, char_start = store.context(0, 'page', 100, 1500)
+    assert text == page.strip()
+    assert char_start == 0
+    text, _ = store.context(0, 'page', 100, 500)
+    assert len(text) <= 520
@@ -0,0 +1,53 @@
+# tests/test_chunker.py
+
+import chunker
+import config
+
+SENTENCE = "This is a sentence about torque. "
+
+def test_spans_match_document_text():
+    pages = [SENTENCE * 40, "Second page. " * 60, SENTENCE * 25]
+    buffer, page_starts = chunker.build_buffer(pages)
+    docs = chunker.chunk_buffer(buffer, page_starts, "doc.pdf", 400, 100)
+    assert docs
+    for doc in docs:
+        start, end = doc.metadata['start_index'], doc.metadata['end_index']
+        assert doc.page_content == buffer[start:end]
+        assert doc.page_content == doc.page_content.strip()
+
+def test_page_attribution():
+    pages = ["Alpha page text. " * 30, "Beta page text. " * 30, "Gamma page text. " * 30]
+    buffer, page_starts = chunker.build_buffer(pages)
+    for doc in chunker.chunk_buffer(buffer, page_starts, "doc.pdf", 300, 0):
+        first, last = doc.metadata['page'], doc.metadata['end_page']
+        assert first <= last
+        assert page_starts[first] <= doc.metadata['start_index'] < page_starts[first] + len(pages[first]) + 1
+        assert page_starts[last] < doc.metadata['end_index'] <= page_starts[last] + len(pages[last])
+        words = {pages[p].split()[0] for p in range(first, last + 1)}
+        assert set(w for w in doc.page_content.split() if w in ("Alpha", "Beta", "Gamma")) <= words
+
+def test_trailing_whitespace_adds_no_tail_chunks():
+    text = SENTENCE * 300
+    spans = chunker.chunk_spans(text, 1000, 200)
+    assert len(spans) == len(chunker.chunk_spans(text.rstrip(), 1000, 200))
+    assert spans[-1][1] == len(text.rstrip())
+    assert all(end - start > 100 for start, end in spans.tolist())
+
+def test_overlap_steps_back_without_stalling():
+    text = SENTENCE * 300
+    spans = chunker.chunk_spans(text, 400, 100).tolist()
+    for (start, end), (next_start, _) in zip(spans, spans[1:]):
+        assert start < next_start < end  # Overlaps the previous chunk and still moves forward
+        assert end - next_start <= 100
+    assert spans[0][0] == 0 and spans[-1][1] == len(text.rstrip())
+
+def test_no_overlap_covers_text_once():
+    text = SENTENCE * 100
+    spans = chunker.chunk_spans(text, 400, 0).tolist()
+    for (_, end), (next_start, _) in zip(spans, spans[1:]):
+        assert next_start >= end
+
+def test_chunks_capped_at_embedding_limit():
+    cap = config.EMBEDDING_MAX_TOKENS * config.CHARS_PER_TOKEN
+    spans = chunker.chunk_spans(SENTENCE * 300, cap * 2, 0)
+    assert max(end - start for start, end in spans.tolist()) <= cap
@@ -0,0 +1,76 @@
+# tests/test_ingest.py
+
+import os
+import select
+import subprocess
+import fitz  # PyMuPDF
+import pytest
+import config
+import ingest
+import ocr
+
+def _pdf(path: str, blank_pages: set, pages: int = 5) -> str:
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        if i not in blank_pages:
+            page.insert_text((72, 72), f"Page {i + 1} has a regular text layer with enough characters.")
+    doc.save(path)
+    return path
+
+def test_blank_page_without_ocr_engine_keeps_text(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OCR_ENABLED", True)
+    monkeypatch.setattr(config, "OCR_CACHE_DIR", str(tmp_path / "ocr"))
+    monkeypatch.setattr(ocr, "unavailable_reason", lambda: "tesseract not installed")
+    parsed = ingest.ingest_pdf(_pdf(str(tmp_path / "doc.pdf"), {2}), 400, 0, isolate=False)
+    text = " ".join(doc.page_content for doc in parsed['chunks'])
+    assert "Page 1 " in text and "Page 5 " in text
+    assert parsed['stats']['ocr_failed'] == 1
+    assert any("OCR" in warning for warning in parsed['warnings'])
+
+def test_inline_parse_errors_become_ingest_errors(tmp_path, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("bad xref table")
+    monkeypatch.setattr(ingest.pdf_processor, "extract_document", broken)
+    with pytest.raises(ingest.IngestError, match="bad xref table"):
+        ingest.ingest_pdf(_pdf(str(tmp_path / "doc.pdf"), set()), 400, 0, isolate=False)
+
+def test_documents_needing_ocr_are_isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OCR_ENABLED", True)
+    monkeypatch.setattr(ocr, "unavailable_reason", lambda: None)
+    assert ingest._needs_ocr(_pdf(str(tmp_path / "scanned.pdf"), {2}))
+    assert not ingest._needs_ocr(_pdf(str(tmp_path / "text.pdf"), set()))
+    monkeypatch.setattr(ocr, "unavailable_reason", lambda: "tesseract not installed")
+    assert not ingest._needs_ocr(_pdf(str(tmp_path / "scanned.pdf"), {2}))
+
+def test_isolated_parse_returns_encoded_images_and_fingerprints(tmp_path, monkeypatch):
+    import io
+    from PIL import Image
+    import image_index
+
+    monkeypatch.setattr(config, "OCR_ENABLED", False)
+    monkeypatch.setattr(config, "IMAGE_EMBEDDINGS_ENABLED", False)
+    photo = io.BytesIO()
+    Image.linear_gradient("L").resize((1200, 900)).convert("RGB").save(photo, format="JPEG")
+    path = _pdf(str(tmp_path / "doc.pdf"), set(), pages=2)
+    doc = fitz.open(path)
+    for page in doc:
+        page.insert_image(fitz.Rect(72, 100, 372, 325), stream=photo.getvalue())
+    doc.saveIncr()
+    doc.close()
+
+    parsed = ingest.ingest_pdf(path, 400, 0, isolate=True)
+    assert [(page_num, img_index) for page_num, img_index, _ in parsed['images']] == [(1, 1), (2, 1)]
+    assert parsed['images'][0][2].size == (1200, 900)
+    assert all(max(small.size) <= config.IMAGE_THUMBNAIL_SIDE for _, small in parsed['fingerprints'])
+    figures = image_index.ImageIndex.build(parsed['images'], fingerprints=parsed['fingerprints'])
+    assert len(figures) == 1 and figures.duplicates == [[(2, 1)]]
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="needs process groups")
+def test_worker_is_killed_with_its_children():
+    # A group leader with a background child, like the parse worker with its OCR processes;
+    # the pipe reaches EOF only once both have exited.
+    leader = subprocess.Popen(["sh", "-c", "sleep 60 & sleep 60"], stdout=subprocess.PIPE, start_new_session=True)
+    ingest._kill_group(leader)
+    leader.wait(5)
+    assert select.select([leader.stdout], [], [], 5)[0] and leader.stdout.read() == b""
@@ -0,0 +1,32 @@
+# tests/test_tables.py
+
+from tables import Table, TableIndex
+
+def _index() -> TableIndex:
+    header = ["Model", "Year", "Price (USD)", "Max torque (Nm)"]
+    rows = [
+        ["A110", "2022", "$2,100", "450"],
+        ["B120", "2023", "$2,900", "610"],
+        ["C130", "2024", "$3,400", "380"],
+    ]
+    return TableIndex([Table(4, 1, header, rows)])
+
+def test_answers_single_cell_questions():
+    index = _index()
+    assert "**$2,900**" in index.answer("What is the price of the B120?")
+    assert "**450**" in index.answer("What is the max torque of model A110?")
+
+def test_answers_highest_and_lowest():
+    index = _index()
+    assert "C130" in index.answer("Which model has the highest price?")
+    assert "**380**" in index.answer("Which model has the lowest max torque?")
+
+def test_no_direct_answer_when_question_says_more_than_the_cell():
+    index = _index()
+    assert index.answer("What was the price of oil in 2023?") is None
+    assert index.answer("What was the highest price of oil?") is None
+    assert index.answer("Why is the B120 price so high?") is None
+
+def test_unanswered_questions_still_get_rows():
+    rows = _index().relevant_rows("What was the price of oil in 2023?", 8)
+    assert [table.rows[r][0] for table, r, _ in rows] == ["B120"]
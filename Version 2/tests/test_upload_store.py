@@ -0,0 +1,16 @@
+# tests/test_upload_store.py
+
+import io
+import os
+import upload_store
+
+def test_gc_keeps_files_in_use_by_sessions(tmp_path):
+    store = upload_store.UploadStore(str(tmp_path), quota_bytes=1500)
+    _, in_use = store.put(io.BytesIO(b"a" * 1000))
+    store.touch(in_use)
+    _, idle = store.put(io.BytesIO(b"b" * 1000))
+    os.utime(idle, (0, 0))  # Least recently used, but not open anywhere
+    _, latest = store.put(io.BytesIO(b"c" * 1000))
+    assert os.path.exists(in_use)
+    assert os.path.exists(latest)
+    assert not os.path.exists(idle)
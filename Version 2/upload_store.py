@@ -0,0 +1,102 @@
+# upload_store.py
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Iterable, Tuple
+import config
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of a file's contents, used to key per-document caches."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(config.UPLOAD_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class UploadStore:
+    """Content-addressed store for uploaded files, garbage-collected to stay under a disk quota."""
+
+    def __init__(self, directory: str, quota_bytes: int):
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+        self._in_use = {}  # absolute path -> last time a session reported using it
+
+    def touch(self, path: str):
+        """Marks a stored file as open in a session; gc keeps it for UPLOAD_IN_USE_SECONDS afterwards."""
+        with self._lock:
+            self._in_use[os.path.abspath(path)] = time.time()
+
+    def put(self, stream: BinaryIO, suffix: str = ".pdf") -> Tuple[str, str]:
+        """Streams `stream` to disk while hashing it; identical content is stored once.
+
+        Returns the SHA-256 digest and the path of the stored file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, partial_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for block in iter(lambda: stream.read(config.UPLOAD_BLOCK_SIZE), b""):
+                    digest.update(block)
+                    f.write(block)
+            path = os.path.join(self.directory, digest.hexdigest() + suffix)
+            with self._lock:
+                if os.path.exists(path):
+                    os.remove(partial_path)
+                    os.utime(path)
+                else:
+                    os.replace(partial_path, path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        self.gc(keep=[path])
+        return digest.hexdigest(), path
+
+    def gc(self, keep: Iterable[str] = ()) -> int:
+        """Deletes abandoned partial uploads, then least recently used files until under quota.
+
+        Files in `keep` and files recently touched by a session are never deleted.
+
+        Returns the number of bytes freed.
+        """
+        keep = {os.path.abspath(path) for path in keep}
+        freed = 0
+        with self._lock:
+            cutoff = time.time() - config.UPLOAD_IN_USE_SECONDS
+            self._in_use = {path: used for path, used in self._in_use.items() if used >= cutoff}
+            keep.update(self._in_use)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.name.endswith(".part"):
+                    if time.time() - stat.st_mtime > config.UPLOAD_PARTIAL_TTL_SECONDS:
+                        freed += _remove(entry.path, stat.st_size)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.quota_bytes:
+                    break
+                if os.path.abspath(path) in keep:
+                    continue
+                removed = _remove(path, size)
+                total -= removed
+                freed += removed
+        return freed
+
+def _remove(path: str, size: int) -> int:
+    try:
+        os.remove(path)
+        return size
+    except FileNotFoundError:
+        return 0
+
+store = UploadStore(config.UPLOAD_DIR, config.UPLOAD_QUOTA_MB << 20)
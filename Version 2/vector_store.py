@@ -1,12 +1,54 @@
 # vector_store.py
 
+import threading
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
-from typing import List
+from typing import List, Optional
+import numpy as np
 import config
+import chunk_store
+from embedding_service import BatchingQueryEmbedder
 
-def create_vector_store(text_chunks: List[str]):
-    """Creates a FAISS vector store from text chunks."""
-    embeddings = HuggingFaceEmbeddings(model_name=config.EMBEDDING_MODEL_NAME)
-    vectorstore = FAISS.from_documents(documents=text_chunks, embedding=embeddings)
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+def load_embedding_model(backend: str = config.EMBEDDING_BACKEND):
+    """Instantiates config.EMBEDDING_MODEL_NAME on the given backend ('torch', 'onnx' or 'onnx-int8')."""
+    if backend == 'torch':
+        return HuggingFaceEmbeddings(
+            model_name=config.EMBEDDING_MODEL_NAME, encode_kwargs={'batch_size': config.EMBEDDING_BATCH_SIZE}
+        )
+    if backend in ('onnx', 'onnx-int8'):
+        from onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings(config.EMBEDDING_MODEL_NAME, quantized=backend == 'onnx-int8')
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+def get_embeddings() -> BatchingQueryEmbedder:
+    """Returns the process-wide embedding model, shared by all sessions and wrapped for query batching."""
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            _embeddings = BatchingQueryEmbedder(
+                load_embedding_model(config.EMBEDDING_BACKEND),
+                max_wait_ms=config.QUERY_BATCH_MAX_WAIT_MS,
+                max_batch=config.QUERY_BATCH_MAX_SIZE,
+                cache_size=config.QUERY_CACHE_SIZE,
+            )
+        return _embeddings
+
+def reset_embeddings():
+    """Drops the shared model so the next `get_embeddings` loads it with the current config (used by replay)."""
+    global _embeddings
+    with _embeddings_lock:
+        _embeddings = None
+
+def create_vector_store(text_chunks: List[str], compact: bool = config.COMPACT_CHUNK_STORE,
+                        buffer: Optional[str] = None, page_starts: Optional[np.ndarray] = None):
+    """Creates a FAISS vector store from text chunks, optionally backed by a compact chunk store.
+
+    Passing the document `buffer` the chunks were cut from enables window/page retrieval.
+    """
+    vectorstore = FAISS.from_documents(documents=text_chunks, embedding=get_embeddings())
+    if compact:
+        chunk_store.attach(vectorstore, text_chunks, buffer, page_starts)
     return vectorstore
\ No newline at end of file